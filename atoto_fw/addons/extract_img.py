@@ -9,10 +9,12 @@ from __future__ import annotations
 import os
 import shutil
 import subprocess
+from functools import lru_cache
 from pathlib import Path
 
 from rich.console import Console
 from rich.prompt import Confirm
+from rich.status import Status
 from ..tui import Menu, FolderPicker, section, safe_filename
 from . import register
 
@@ -22,8 +24,9 @@ SEVEN_ZIP_PATHS = [
     r"C:\Program Files (x86)\7-Zip\7z.exe",
 ]
 
+@lru_cache(maxsize=1)
 def find_7zip() -> str | None:
-    """Find 7z.exe in PATH or common locations."""
+    """Find 7z.exe in PATH or common locations (cached; see find_7zip.cache_clear)."""
     # 1. Check local bin (Standalone)
     local_7z = Path("bin") / "7za.exe"
     if local_7z.exists():
@@ -47,6 +50,8 @@ def _addon_extract_img(console: Console, **kwargs):
     # 1. Check for 7-Zip
     exe_7z = find_7zip()
     if not exe_7z:
+        # Don't remember a miss: re-probe next time in case 7-Zip gets installed
+        find_7zip.cache_clear()
         console.print("[red]Error:[/] [bold]7z[/] header executable not found.")
         console.print("Please install 7-Zip (Windows) or p7zip-full (Linux).")
         if not Confirm.ask("Back", default=True):
@@ -64,7 +69,8 @@ def _addon_extract_img(console: Console, **kwargs):
     root = Path(root_str)
     
     # Scan for .img
-    imgs = sorted([p for p in root.glob("*.img")])
+    # Stat once here; the menu below is rebuilt on every pass.
+    imgs = sorted((p, p.stat().st_size) for p in root.glob("*.img"))
     if not imgs:
         console.print("[yellow]No .img files found in folder.[/]")
         Confirm.ask("Back", default=True)
@@ -73,8 +79,8 @@ def _addon_extract_img(console: Console, **kwargs):
     # Menu Loop
     while True:
         items = []
-        for p in imgs:
-            sz = p.stat().st_size / (1024*1024)
+        for p, size in imgs:
+            sz = size / (1024*1024)
             items.append((f"{p.name} [dim]({sz:.1f} MB)[/]", p))
         
         # Add Help Item
@@ -144,15 +150,10 @@ This tool is provided for [cyan]VIEWING[/] and [cyan]ANALYSIS[/] only.
             cmd = [exe_7z, "x", "-y", f"-o{str(out_dir)}", str(target_img)]
             
             try:
-                # We assume 7z outputs to stdout, which we can capture or let flow
-                # Let's let it flow but indented? Or capture and show spinner?
-                # 7z output is verbose. Let's redirect to pipe and update spinner.
-                
-                with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True) as proc:
-                     while True:
-                        line = proc.stdout.readline()
-                        if not line: break
-                        # print(line.strip()) # Debug
+                # 7z output is verbose and we don't use it; discard stdout and
+                # keep stderr (raw bytes) only to report failures.
+                with Status("[bold]Extracting…[/]", console=console, spinner="dots"):
+                    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
                 
                 if proc.returncode == 0:
                     console.print(f"[green]Success![/] Extracted to: {out_dir}")
@@ -173,6 +174,9 @@ This tool is provided for [cyan]VIEWING[/] and [cyan]ANALYSIS[/] only.
 
                 else:
                     console.print(f"[red]Extraction failed with code {proc.returncode}[/]")
+                    err = proc.stderr.decode(errors="replace").strip()
+                    if err:
+                        console.print(err, style="dim", markup=False)
                     
             except Exception as e:
                 console.print(f"[red]Error running 7-Zip:[/] {e}")
@@ -10,7 +10,8 @@ Features
 1) Decompress:  *.new.dat.br  →  *.new.dat   (Brotli / BrotliCFFI)
 2) Convert:     <name>.transfer.list + <name>.new.dat  →  <name>.img
    (supports transfer.list v1–v4; v4 header: version, total, stashed, block_size)
-3) Optional:    Try 'simg2img' to produce <name>_raw.img from sparse images.
+3) Optional:    Produce <name>_raw.img from sparse images (in-process;
+                external 'simg2img' is used as a fallback).
 
 Public API
 ----------
@@ -24,12 +25,16 @@ Registers a Rich-based action: "Extract OTA (dat.br → dat → img)"
 
 from __future__ import annotations
 import argparse
+import itertools
 import os
 import sys
 import shutil
+import struct
 import subprocess
 from pathlib import Path
-from typing import Callable, Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .extract_zip import iter_files
 
 # --- Brotli import (either package works) ---
 try:
@@ -42,6 +47,8 @@ except ImportError:
 
 KNOWN_CMDS = {"new","zero","erase","move","stash","free","append","bsdiff","imgdiff"}
 
+BROTLI_CHUNK = 1024 * 1024
+
 # ====================== internals ======================
 
 def _eprint(*a):  # stderr helper
@@ -55,73 +62,85 @@ def _progress_emit(progress: Optional[Callable[[str], None]], msg: str) -> None:
         pass
 
 # ---------- Brotli ----------
+# The brotli / brotlicffi APIs differ slightly; pick the implementation once
+# at import time so decompress_brotli_file() is a plain dispatch.
+def _brotli_streaming(step_name: str) -> Callable:
+    def _impl(fin, fout) -> None:
+        dec = brotli.Decompressor()
+        step = getattr(dec, step_name)
+        for chunk in iter(lambda: fin.read(BROTLI_CHUNK), b""):
+            fout.write(step(chunk))
+        if hasattr(dec, "is_finished") and not dec.is_finished():
+            raise RuntimeError("Brotli stream is truncated")
+    return _impl
+
+def _brotli_oneshot(fin, fout) -> None:
+    fout.write(brotli.decompress(fin.read()))
+
+_brotli_impl: Optional[Callable] = None
+if brotli is not None:
+    _dec_cls = getattr(brotli, "Decompressor", None)
+    if _dec_cls is not None and hasattr(_dec_cls, "process"):
+        _brotli_impl = _brotli_streaming("process")
+    elif _dec_cls is not None and hasattr(_dec_cls, "decompress"):
+        _brotli_impl = _brotli_streaming("decompress")
+    elif hasattr(brotli, "decompress"):
+        _brotli_impl = _brotli_oneshot
+
 def decompress_brotli_file(src: Path, dst: Path) -> None:
-    """One-shot Brotli decompress (works across brotli variants)."""
-    if brotli is None:
+    """Brotli decompress src -> dst (streams when the module supports it)."""
+    if _brotli_impl is None:
         raise RuntimeError(
             "Brotli module not found. Install one of:\n"
             "  pip install brotli   (or)\n"
             "  pip install brotlicffi"
         )
-    with open(src, "rb") as fin:
-        comp = fin.read()
-
-    if hasattr(brotli, "decompress"):
-        out = brotli.decompress(comp)
-    else:
-        dec_cls = getattr(brotli, "Decompressor", None)
-        if dec_cls is None:
-            raise RuntimeError("No compatible brotli API found")
-        dec = dec_cls()
-        if hasattr(dec, "process"):
-            out = dec.process(comp)
-        elif hasattr(dec, "decompress"):
-            out = dec.decompress(comp)
-        else:
-            raise RuntimeError("Unsupported brotli Decompressor interface")
-
-    with open(dst, "wb") as fout:
-        fout.write(out)
+    with open(src, "rb") as fin, open(dst, "wb") as fout:
+        _brotli_impl(fin, fout)
 
 # ---------- transfer.list parsing ----------
-def parse_header(lines: List[str]) -> Tuple[int, int, int, int, List[str]]:
-    """Return (version, total_blocks, block_size, first_cmd_idx, cleaned_lines)."""
-    L = [l.strip() for l in lines if l.strip()!='']
-    if len(L) < 2:
+TRANSFER_LIST_BUFFER = 1 << 20
+
+def _nonblank_lines(f: Iterable[str]) -> Iterator[str]:
+    for line in f:
+        line = line.strip()
+        if line:
+            yield line
+
+def parse_header(lines: Iterator[str]) -> Tuple[int, int, int, Optional[str]]:
+    """
+    Consume the header from an iterator of stripped, non-blank lines.
+    Return (version, total_blocks, block_size, first_cmd_line); the iterator
+    is left positioned right after the first command line (None if there is none).
+    """
+    version_line = next(lines, None)
+    total_line = next(lines, None)
+    if version_line is None or total_line is None:
         raise ValueError("transfer.list too short")
-    version = int(L[0])
+    version = int(version_line)
     if version not in (1,2,3,4):
         raise ValueError(f"Unsupported transfer.list version: {version}")
-    total_blocks = int(L[1])
+    total_blocks = int(total_line)
 
-    idx = 2
     block_size = 4096
-    if version == 3:
-        if idx < len(L):
-            try:
-                bs = int(L[idx])
-            except Exception:
-                bs = 0
-            block_size = bs if bs > 0 else 4096
-        idx += 1
-    elif version == 4:
-        idx += 1  # stashed_blocks (ignored)
-        if idx < len(L):
+    if version in (3, 4):
+        if version == 4:
+            next(lines, None)  # stashed_blocks (ignored)
+        bs_line = next(lines, None)
+        if bs_line is not None:
             try:
-                bs = int(L[idx])
+                bs = int(bs_line)
             except Exception:
                 bs = 0
             block_size = bs if bs > 0 else 4096
-        idx += 1
 
     # advance to first command line
-    while idx < len(L):
-        tok = L[idx].split(' ', 1)[0].lower()
+    for line in lines:
+        tok = line.split(' ', 1)[0].lower()
         if tok in KNOWN_CMDS:
-            break
-        idx += 1
+            return version, total_blocks, block_size, line
 
-    return version, total_blocks, block_size, idx, L
+    return version, total_blocks, block_size, None
 
 def parse_ranges_count_integers(ranges_str: str) -> List[Tuple[int,int]]:
     """
@@ -139,51 +158,158 @@ def parse_ranges_count_integers(ranges_str: str) -> List[Tuple[int,int]]:
         raise ValueError("Bad ranges: odd integer count")
     return [(nums[i], nums[i+1]) for i in range(0, cnt, 2)]
 
+SDAT_COPY_CHUNK = 16 * 1024 * 1024
+
+# Offset-based copy: no seek bookkeeping, and large ranges are copied in
+# bounded chunks. pread/pwrite are POSIX-only, so Windows seeks explicitly.
+if hasattr(os, "pread") and hasattr(os, "pwrite"):
+    def _copy_at(fd_in: int, in_off: int, fd_out: int, out_off: int, length: int) -> None:
+        while length > 0:
+            data = os.pread(fd_in, min(length, SDAT_COPY_CHUNK), in_off)
+            if not data:
+                raise EOFError("new.dat ended unexpectedly")
+            view = memoryview(data)
+            while view:
+                n = os.pwrite(fd_out, view, out_off)
+                view = view[n:]
+                out_off += n
+            in_off += len(data)
+            length -= len(data)
+else:
+    def _copy_at(fd_in: int, in_off: int, fd_out: int, out_off: int, length: int) -> None:
+        os.lseek(fd_in, in_off, os.SEEK_SET)
+        os.lseek(fd_out, out_off, os.SEEK_SET)
+        while length > 0:
+            data = os.read(fd_in, min(length, SDAT_COPY_CHUNK))
+            if not data:
+                raise EOFError("new.dat ended unexpectedly")
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd_out, view):]
+            length -= len(data)
+
 def sdat2img(transfer_list_path: Path, new_dat_path: Path, out_img_path: Path) -> None:
-    with open(transfer_list_path, 'r', errors='ignore') as f:
-        version, total_blocks, block_size, idx, L = parse_header(f.readlines())
-    print(f"[sdat2img] {transfer_list_path.name}  v{version}  blocks={total_blocks}  block_size={block_size}")
-
-    cmds: List[Tuple[str, str]] = []
-    for l in L[idx:]:
-        l = l.strip()
-        if not l:
-            continue
-        c, a = (l.split(' ',1) + [""])[:2]
-        cmds.append((c.lower(), a.strip()))
-
-    with open(out_img_path, 'wb') as fout, open(new_dat_path, 'rb') as fdat:
-        fout.truncate(total_blocks * block_size)
-        for cmd, arg in cmds:
-            if cmd == 'new':
-                for start, end in parse_ranges_count_integers(arg):
-                    length = (end - start) * block_size
-                    if length <= 0:
-                        continue
-                    data = fdat.read(length)
-                    if len(data) != length:
-                        raise EOFError("new.dat ended unexpectedly")
-                    fout.seek(start * block_size)
-                    fout.write(data)
-            elif cmd in ('zero','erase'):
-                # sparse zero-fill — nothing to write
-                continue
-            else:
-                # incremental-only ops (ignored for full OTAs)
-                continue
+    # Stream the transfer.list: header first, then commands straight into the
+    # write loop (full-image lists can be very long).
+    with open(transfer_list_path, 'r', errors='ignore', buffering=TRANSFER_LIST_BUFFER) as f:
+        lines = _nonblank_lines(f)
+        version, total_blocks, block_size, first = parse_header(lines)
+        print(f"[sdat2img] {transfer_list_path.name}  v{version}  blocks={total_blocks}  block_size={block_size}")
+
+        with open(out_img_path, 'wb') as fout, open(new_dat_path, 'rb') as fdat:
+            fout.truncate(total_blocks * block_size)
+            fd_out, fd_dat = fout.fileno(), fdat.fileno()
+            dat_off = 0
+            for l in itertools.chain([first] if first else [], lines):
+                c, a = (l.split(' ',1) + [""])[:2]
+                cmd, arg = c.lower(), a.strip()
+                if cmd == 'new':
+                    for start, end in parse_ranges_count_integers(arg):
+                        length = (end - start) * block_size
+                        if length <= 0:
+                            continue
+                        _copy_at(fd_dat, dat_off, fd_out, start * block_size, length)
+                        dat_off += length
+                elif cmd in ('zero','erase'):
+                    # sparse zero-fill — nothing to write
+                    continue
+                else:
+                    # incremental-only ops (ignored for full OTAs)
+                    continue
+
+# ---------- sparse image -> raw ----------
+# Android sparse format (system/core/libsparse/sparse_format.h)
+SPARSE_MAGIC = 0xED26FF3A
+SPARSE_HEADER = struct.Struct("<I4H4I")   # magic, major, minor, file_hdr_sz, chunk_hdr_sz, blk_sz, total_blks, total_chunks, checksum
+CHUNK_HEADER = struct.Struct("<2H2I")     # chunk_type, reserved, chunk_sz (blocks), total_sz (bytes)
+CHUNK_TYPE_RAW = 0xCAC1
+CHUNK_TYPE_FILL = 0xCAC2
+CHUNK_TYPE_DONT_CARE = 0xCAC3
+CHUNK_TYPE_CRC32 = 0xCAC4
+SPARSE_COPY_CHUNK = 1024 * 1024
+
+def sparse_to_raw(src: Path, dst: Path) -> bool:
+    """
+    In-process simg2img. Returns False (and writes nothing) if src is not a
+    sparse image. DONT_CARE and zero FILL chunks are left as holes.
+    """
+    with open(src, "rb") as fin:
+        hdr = fin.read(SPARSE_HEADER.size)
+        if len(hdr) < SPARSE_HEADER.size:
+            return False
+        (magic, major, _minor, file_hdr_sz, chunk_hdr_sz,
+         blk_sz, total_blks, total_chunks, _csum) = SPARSE_HEADER.unpack(hdr)
+        if magic != SPARSE_MAGIC:
+            return False
+        if major != 1:
+            raise ValueError(f"Unsupported sparse image version: {major}")
+        fin.seek(file_hdr_sz)
+
+        with open(dst, "wb") as fout:
+            out_off = 0
+            for _ in range(total_chunks):
+                ch = fin.read(chunk_hdr_sz)
+                if len(ch) < CHUNK_HEADER.size:
+                    raise EOFError("sparse image ended unexpectedly")
+                ctype, _, chunk_sz, _total_sz = CHUNK_HEADER.unpack_from(ch)
+                length = chunk_sz * blk_sz
+                if ctype == CHUNK_TYPE_RAW:
+                    fout.seek(out_off)
+                    remaining = length
+                    while remaining:
+                        data = fin.read(min(remaining, SPARSE_COPY_CHUNK))
+                        if not data:
+                            raise EOFError("sparse image ended unexpectedly")
+                        fout.write(data)
+                        remaining -= len(data)
+                elif ctype == CHUNK_TYPE_FILL:
+                    fill = fin.read(4)
+                    if fill != b"\x00\x00\x00\x00":
+                        fout.seek(out_off)
+                        block = fill * (blk_sz // 4)
+                        blocks_per_write = max(1, SPARSE_COPY_CHUNK // blk_sz)
+                        left = chunk_sz
+                        while left:
+                            n = min(left, blocks_per_write)
+                            fout.write(block * n)
+                            left -= n
+                elif ctype == CHUNK_TYPE_CRC32:
+                    fin.read(4)
+                elif ctype != CHUNK_TYPE_DONT_CARE:
+                    raise ValueError(f"Unknown sparse chunk type: {ctype:#x}")
+                out_off += length
+            fout.truncate(total_blks * blk_sz)
+    return True
+
+def find_simg2img() -> Optional[str]:
+    """Locate an external simg2img: PATH, then ./bin/, then CWD."""
+    found = shutil.which("simg2img.exe") or shutil.which("simg2img")
+    if found:
+        return found
+    for local in (Path("bin") / "simg2img.exe", Path("simg2img.exe")):
+        if local.exists():
+            return str(local.resolve())
+    return None
 
 # ---------- helpers ----------
-def find_all(root: Path) -> Tuple[List[Path], List[Path]]:
+def find_all(root: Path, entries: Optional[Iterable[os.PathLike]] = None) -> Tuple[List[Path], List[Path]]:
+    """
+    Return (*.new.dat.br files, *.transfer.list files) under root.
+    If 'entries' (paths or os.DirEntry objects) is given, classify those
+    instead of walking root again.
+    """
+    if entries is None:
+        entries = iter_files(root)
+    # Match on plain (dirpath, name) strings; only build Paths for hits.
+    pairs = (os.path.split(os.fspath(e)) for e in entries)
     br_files: List[Path] = []
     lists: List[Path] = []
-    for dirpath, _, filenames in os.walk(root):
-        for name in filenames:
-            ln = name.lower()
-            full = Path(dirpath) / name
-            if ln.endswith(".new.dat.br"):
-                br_files.append(full)
-            elif ln.endswith(".transfer.list"):
-                lists.append(full)
+    for dirpath, name in pairs:
+        ln = name.lower()
+        if ln.endswith(".new.dat.br"):
+            br_files.append(Path(dirpath, name))
+        elif ln.endswith(".transfer.list"):
+            lists.append(Path(dirpath, name))
     return br_files, lists
 
 def list_basename_without_transfer_dot_list(path: Path) -> str:
@@ -201,15 +327,20 @@ def run_ota_extract(
     raw: bool = False,
     progress: Optional[Callable[[str], None]] = None,
     cleanup: bool = False,
+    _precomputed: Optional[Tuple[List[Path], List[Path]]] = None,
 ) -> Dict[str,int]:
     """
     Execute OTA extraction in 'root'.
     Returns stats: {'decompressed': N, 'converted': M, 'raw_ok': R, 'errors': E}
+    '_precomputed' is a find_all() result (absolute paths) from a caller that
+    has already scanned root; it skips the directory walk.
     """
     root = Path(root).resolve()
-    _progress_emit(progress, f"Scanning: {root}")
-
-    br_files, lists = find_all(root)
+    if _precomputed is not None:
+        br_files, lists = _precomputed
+    else:
+        _progress_emit(progress, f"Scanning: {root}")
+        br_files, lists = find_all(root)
     stats = {"decompressed": 0, "converted": 0, "raw_ok": 0, "errors": 0}
 
     # 1) Decompress .br
@@ -253,44 +384,44 @@ def run_ota_extract(
             _eprint(f"! FAILED {base}: {ex}")
             continue
 
-        # Optional: sparse -> raw using simg2img if requested and available
+        # Optional: sparse -> raw (in-process; external simg2img as fallback)
         if raw:
-            # Check PATH, then local bin/, then CWD
-            simg2img = shutil.which("simg2img.exe") or shutil.which("simg2img")
-            if not simg2img:
-                # Fallback: check ./bin/simg2img.exe
-                local_bin = Path("bin") / "simg2img.exe"
-                if local_bin.exists():
-                    simg2img = str(local_bin.resolve())
+            raw_path = dirp / f"{base}_raw.img"
+            if (not overwrite) and raw_path.exists():
+                _progress_emit(progress, f"    -> skip raw (exists): {raw_path.relative_to(root)}")
+                continue
+            try:
+                if sparse_to_raw(img, raw_path):
+                    stats["raw_ok"] += 1
+                    _progress_emit(progress, f"    -> raw: {raw_path.name}")
                 else:
-                    # Fallback: check ./simg2img.exe
-                    local_root = Path("simg2img.exe")
-                    if local_root.exists():
-                        simg2img = str(local_root.resolve())
+                    _progress_emit(progress, "       (not sparse) raw not created")
+                continue
+            except Exception as ex:
+                if raw_path.exists():
+                    raw_path.unlink()
+                _progress_emit(progress, f"       in-process raw failed ({ex}); trying simg2img")
 
+            simg2img = find_simg2img()
             if simg2img:
-                raw_path = dirp / f"{base}_raw.img"
-                if (not overwrite) and raw_path.exists():
-                    _progress_emit(progress, f"    -> skip raw (exists): {raw_path.relative_to(root)}")
-                else:
-                    _progress_emit(progress, f"    -> simg2img: {raw_path.name}")
-                    try:
-                        r = subprocess.run([simg2img, str(img), str(raw_path)], capture_output=True, text=True)
-                        if r.returncode != 0:
-                            # If it fails, remove empty file (if any)
-                            if raw_path.exists() and raw_path.stat().st_size == 0:
-                                raw_path.unlink()
-                            msg = r.stderr.strip() | r.stdout.strip() if (r.stderr or r.stdout) else "simg2img error"
-                            _progress_emit(progress, f"       (not sparse or failed) {msg}")
+                _progress_emit(progress, f"    -> simg2img: {raw_path.name}")
+                try:
+                    r = subprocess.run([simg2img, str(img), str(raw_path)], capture_output=True, text=True)
+                    if r.returncode != 0:
+                        # If it fails, remove empty file (if any)
+                        if raw_path.exists() and raw_path.stat().st_size == 0:
+                            raw_path.unlink()
+                        msg = (r.stderr.strip() or r.stdout.strip()) or "simg2img error"
+                        _progress_emit(progress, f"       (not sparse or failed) {msg}")
+                    else:
+                        if raw_path.exists() and raw_path.stat().st_size > 0:
+                            stats["raw_ok"] += 1
                         else:
-                            if raw_path.exists() and raw_path.stat().st_size > 0:
-                                stats["raw_ok"] += 1
-                            else:
-                                if raw_path.exists():
-                                    raw_path.unlink()
-                                _progress_emit(progress, "       (not sparse) raw not created")
-                    except Exception as ex:
-                        _progress_emit(progress, f"       simg2img failed (ignored): {ex}")
+                            if raw_path.exists():
+                                raw_path.unlink()
+                            _progress_emit(progress, "       (not sparse) raw not created")
+                except Exception as ex:
+                    _progress_emit(progress, f"       simg2img failed (ignored): {ex}")
             else:
                 _progress_emit(progress, "    -> simg2img not found; skipping raw")
 
@@ -420,7 +551,10 @@ def _ui_ota_extract(console, **kwargs):
         except Exception:
             pass
 
-    stats = run_ota_extract(root, overwrite=overwrite, raw=raw, progress=progress, cleanup=cleanup)
+    # Reuse the caller's scan only if the user kept the suggested folder
+    precomputed = kwargs.get("_precomputed") if root == default_root else None
+    stats = run_ota_extract(root, overwrite=overwrite, raw=raw, progress=progress,
+                            cleanup=cleanup, _precomputed=precomputed)
     console.print(
         f"[green]Done.[/] Decompressed={stats['decompressed']}  "
         f"Converted={stats['converted']}  RawOK={stats['raw_ok']}  Errors={stats['errors']}"
@@ -6,26 +6,105 @@ atoto_fw.addons.extract_zip
 Add-on: Extract downloaded firmware Zip files.
 """
 from __future__ import annotations
+import io
 import os
+import shutil
+import time
 import zipfile
 from pathlib import Path
-from typing import Optional, List, Any
+from typing import Optional, Iterator, List, Any, Tuple
 
-def scan_for_zips(root: Path) -> List[Path]:
+def iter_files(root: Path | str) -> Iterator[os.DirEntry]:
+    """
+    Recursively yield DirEntry objects for every non-directory under root.
+    Like os.walk: unreadable folders are skipped and dir symlinks aren't followed.
+    """
+    try:
+        it = os.scandir(root)
+    except OSError:
+        return
+    with it:
+        for e in it:
+            try:
+                is_dir = e.is_dir(follow_symlinks=False)
+            except OSError:
+                is_dir = False
+            if is_dir:
+                yield from iter_files(e.path)
+            else:
+                yield e
+
+def scan_for_zips(root: Path) -> List[Tuple[Path, os.stat_result]]:
+    """Return (zip path, stat) pairs under root, newest first. Stat is taken once."""
     zips = []
-    for dirpath, _, filenames in os.walk(root):
-        for f in filenames:
-            if f.lower().endswith(".zip"):
-                zips.append(Path(dirpath) / f)
-    return sorted(zips, key=lambda p: p.stat().st_mtime, reverse=True)
-
-def _extract_zip_file(console: Console, zip_path: Path, out_path: Path) -> bool:
-    """Helper to unzip with progress bar. Returns True on success."""
+    for e in iter_files(root):
+        if e.name.lower().endswith(".zip"):
+            zips.append((Path(e.path), e.stat()))
+    return sorted(zips, key=lambda z: z[1].st_mtime, reverse=True)
+
+COPY_BUFFER = 1024 * 1024
+PROGRESS_INTERVAL = 0.05  # seconds between progress bar updates
+
+def _member_path(dest: Path, filename: str) -> Path:
+    """Mirror ZipFile.extract()'s sanitising: no drive letters, absolute paths or '..'."""
+    arcname = filename.replace("/", os.sep)
+    if os.altsep:
+        arcname = arcname.replace(os.altsep, os.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    parts = [x for x in arcname.split(os.sep) if x not in ("", os.curdir, os.pardir)]
+    if os.sep == "\\":
+        # Same substitutions zipfile makes for names Windows can't store
+        table = str.maketrans(':<>|"?*', "_______")
+        parts = [x for x in (x.translate(table).rstrip(".") for x in parts) if x]
+    return Path(dest, *parts)
+
+def extract_member(zf: zipfile.ZipFile, info: zipfile.ZipInfo, dest: Path,
+                   pwd: Optional[bytes] = None) -> Path:
+    """Extract one member by streaming it straight to disk. Returns the written path."""
+    target = _member_path(dest, info.filename)
+    if info.is_dir():
+        target.mkdir(parents=True, exist_ok=True)
+        return target
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if info.file_size == 0:
+        open(target, "wb").close()
+        return target
+    bufsize = min(info.file_size, COPY_BUFFER)
+    # A BufferedReader in front of the inflate stream means fewer, larger
+    # reads into ZipExtFile for big images (system.img etc.).
+    with zf.open(info, pwd=pwd) as raw, \
+         io.BufferedReader(raw, buffer_size=bufsize) as src, \
+         open(target, "wb") as dst:
+        if info.file_size >= COPY_BUFFER and hasattr(os, "posix_fallocate"):
+            # Reserve the whole file up front: fewer, contiguous extents for big images
+            try:
+                os.posix_fallocate(dst.fileno(), 0, info.file_size)
+            except OSError:
+                pass
+        shutil.copyfileobj(src, dst, bufsize)
+    return target
+
+class _NoCrcZipFile(zipfile.ZipFile):
+    """ZipFile whose member streams skip the running CRC-32 check."""
+    def open(self, name, mode="r", pwd=None, **kwargs):
+        f = super().open(name, mode, pwd=pwd, **kwargs)
+        if mode == "r":
+            # ZipExtFile skips _update_crc() entirely when there's nothing to compare against
+            f._expected_crc = None
+        return f
+
+def _extract_zip_file(console: Console, zip_path: Path, out_path: Path,
+                      verify: bool = True) -> Optional[List[Path]]:
+    """Helper to unzip with progress bar. Returns the extracted paths, or None on failure."""
     console.print(f"\n[bold]Extracting[/] {zip_path.name} ...")
+    zip_cls = zipfile.ZipFile if verify else _NoCrcZipFile
     try:
-        with zipfile.ZipFile(zip_path, 'r') as zf:
+        with zip_cls(zip_path, 'r') as zf:
             infos = zf.infolist()
-            total_size = sum(i.file_size for i in infos)
+            # Track progress in compressed bytes: that's what we actually read
+            # from disk, and the archive size gives the total without a pass
+            # over infolist().
+            total_size = zip_path.stat().st_size
             
             with Progress(
                 TextColumn("[progress.description]{task.description}"),
@@ -36,21 +115,31 @@ def _extract_zip_file(console: Console, zip_path: Path, out_path: Path) -> bool:
             ) as progress:
                 task = progress.add_task("Unzipping", total=total_size)
                 extracted_size = 0
+                extracted: List[Path] = []
+                # Many-small-file zips would otherwise update the task per entry;
+                # the bar only redraws ~10x/s, so ~20 updates/s is plenty.
+                next_update = 0.0
                 for info in infos:
-                    zf.extract(info, path=out_path)
-                    extracted_size += info.file_size
-                    progress.update(task, completed=extracted_size)
+                    extracted.append(extract_member(zf, info, out_path))
+                    extracted_size += info.compress_size
+                    now = time.monotonic()
+                    if now >= next_update:
+                        progress.update(task, completed=extracted_size)
+                        next_update = now + PROGRESS_INTERVAL
+                # Local headers / central directory make up the remainder
+                progress.update(task, completed=total_size)
         
         console.print(f"[green]Success![/] Extracted to: [bold]{out_path}[/]")
-        return True
+        return extracted
     except Exception as e:
         console.print(f"[red]Extraction failed:[/red] {e}")
-        return False
+        return None
 
 try:
     from rich.console import Console
     from rich.prompt import Prompt, Confirm
     from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, DownloadColumn, TimeRemainingColumn
+    from ..core.config import load_cfg
     from ..tui import Menu, FolderPicker, section
     from . import register
 
@@ -73,9 +162,9 @@ try:
 
         # Menu to pick zip
         items = []
-        for z in zips:
+        for z, st in zips:
             # label: filename (size)
-            sz = z.stat().st_size / (1024*1024)
+            sz = st.st_size / (1024*1024)
             items.append((f"{z.name} [dim]({sz:.1f} MB)[/]", z))
         
         items.append(("Cancel", None))
@@ -104,17 +193,22 @@ try:
         processed_zips = {current_zip.resolve()}
         current_out = out_dir
         
-        if not _extract_zip_file(console, current_zip, current_out):
+        # CRC checks are on unless turned off in Settings ("verify_zip_crc")
+        verify = bool(load_cfg().get("verify_zip_crc", True))
+        extracted = _extract_zip_file(console, current_zip, current_out, verify)
+        if extracted is None:
             Confirm.ask("Back", default=True)
             return
 
-        # Check for nested zips repeatedly
+        # Check for nested zips repeatedly.
+        # Only files we just extracted can be new zips, so look at those
+        # instead of re-walking the whole output tree on every pass.
+        candidates: List[Path] = extracted
         while True:
-            # Scan output folder for new zips
-            nested_zips = scan_for_zips(current_out)
-            
-            # Filter out already processed zips
-            nested_zips = [z for z in nested_zips if z.resolve() not in processed_zips]
+            nested_zips = [
+                p for p in candidates
+                if p.suffix.lower() == ".zip" and p.resolve() not in processed_zips
+            ]
             
             if not nested_zips:
                 break
@@ -122,12 +216,15 @@ try:
             console.print(f"\n[bold cyan]Found {len(nested_zips)} new nested zip file(s).[/]")
             
             did_nested = False
+            candidates = []
             for nz in nested_zips:
                  if Confirm.ask(f"Found nested zip: [bold]{nz.name}[/]. Unzip this too?", default=True):
                      # Where to? Default: subfolder of same name
                      nz_out = nz.with_suffix("")
-                     if _extract_zip_file(console, nz, nz_out):
+                     nz_extracted = _extract_zip_file(console, nz, nz_out, verify)
+                     if nz_extracted is not None:
                          did_nested = True
+                         candidates.extend(nz_extracted)
                          processed_zips.add(nz.resolve())
                      # If failed, we don't add to processed? Or we do to avoid asking again?
                      # Let's add to processed so we don't annoy user.
@@ -140,14 +237,19 @@ try:
                 break # No new unzips happened, so no new files to discover. Stop.
 
         # 4. Chain to OTA Extractor?
-        # Check if we see payload.bin or .new.dat.br inside
-        has_ota_files = False
-        for root_scan, _, files in os.walk(out_dir):
-            for f in files:
-                if f.endswith(".new.dat.br") or f.endswith(".transfer.list"):
-                    has_ota_files = True
-                    break
-            if has_ota_files: break
+        # Check if we see .new.dat.br / .transfer.list inside. The scan result
+        # is handed to the extractor so it doesn't walk the same tree again.
+        try:
+            from .extract_ota import find_all, _ui_ota_extract
+        except ImportError:
+            find_all = _ui_ota_extract = None
+
+        if find_all:
+            ota_files = find_all(out_dir.resolve())
+            has_ota_files = bool(ota_files[0] or ota_files[1])
+        else:
+            has_ota_files = any(e.name.endswith((".new.dat.br", ".transfer.list"))
+                                for e in iter_files(out_dir))
         
         # Also check if there's an inner 'update.zip' we should mention (if we skipped it)
         # inner_zip = out_dir / "update.zip"
@@ -156,11 +258,9 @@ try:
 
         if has_ota_files:
             if Confirm.ask("\nFound OTA files (dat.br/transfer.list). Run [bold]OTA Extractor[/] now?", default=True):
-                 # Try to import and run the other addon
-                 try:
-                     from .extract_ota import _ui_ota_extract
-                     _ui_ota_extract(console, root=out_dir)
-                 except ImportError:
+                 if _ui_ota_extract:
+                     _ui_ota_extract(console, root=out_dir, _precomputed=ota_files)
+                 else:
                      console.print("[red]OTA Extractor addon not found.[/]")
         
         Confirm.ask("Done. Press Enter to return.", default=True)
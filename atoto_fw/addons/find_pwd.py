@@ -1,65 +1,149 @@
 # atoto_fw/addons/find_pwd.py
+import hashlib
+import json
+import mmap
 import os
 import re
 import zipfile
 import zlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Iterable, Optional
 from rich import print
 from rich.panel import Panel
 from rich.prompt import Prompt, Confirm
 from atoto_fw.addons import register
+from atoto_fw.core.config import config_dir
+from atoto_fw.addons.extract_zip import extract_member, iter_files
 
 # Regex for the password format we found (32 hex chars)
-# It appeared as a standalone null-terminated string/or just surrounded by non-alphanums in the binary
-RE_HEX_32 = re.compile(rb'(?<![a-fA-F0-9])([a-fA-F0-9]{32})(?![a-fA-F0-9])')
+# It appeared as a standalone null-terminated string/or just surrounded by non-alphanums in the binary.
+# We match maximal hex runs and keep the ones exactly 32 long: same result as
+# lookarounds around {32}, but a pattern that starts with a plain char class
+# lets the regex engine skip quickly through the (mostly non-hex) binary.
+HEX_KEY_LEN = 32
+RE_HEX_RUN = re.compile(rb'[a-fA-F0-9]{%d,}' % HEX_KEY_LEN)
+_HEX_BYTES = frozenset(b'0123456789abcdefABCDEF')
+
+# Huge binaries are scanned in windows; each window overlaps the next by one key
+# length so a key straddling the boundary is still seen whole in one window.
+SCAN_WINDOW = 8 * 1024 * 1024
 
 KNOWN_KEYS = {
     b'048a02243bb74474b25233bda3cd02f8',  # S8 Gen2 (6315) found in lsec6315update
 }
 
+# Passwords that worked before, keyed by a fingerprint of the zip's first 4 KiB.
+# Firmware of the same family tends to repeat, so a hit here skips the search.
+PWD_HITS_FILE = "pwd_hits.json"
+
+def _zip_fingerprint(zip_path: Path) -> Optional[str]:
+    try:
+        with open(zip_path, 'rb') as f:
+            return hashlib.sha1(f.read(4096)).hexdigest()
+    except OSError:
+        return None
+
+def _load_pwd_hits() -> dict:
+    try:
+        data = json.loads((config_dir() / PWD_HITS_FILE).read_text(encoding="utf-8"))
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+def _save_pwd_hits(hits: dict) -> None:
+    try:
+        d = config_dir()
+        d.mkdir(parents=True, exist_ok=True)
+        (d / PWD_HITS_FILE).write_text(json.dumps(hits, indent=2), encoding="utf-8")
+    except Exception:
+        pass  # cache only; never fatal
+
 def find_candidate_strings(file_path: Path) -> set[bytes]:
     """Scans a binary file for 32-char hex strings."""
     candidates = set()
     try:
-        data = file_path.read_bytes()
-        # Find all matches
-        for m in RE_HEX_32.finditer(data):
-            candidates.add(m.group(1))
+        # mmap lets the regex scan the page cache directly (no full read into RAM)
+        with open(file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return candidates  # mmap can't map an empty file
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                can_release = (hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_DONTNEED')
+                               and SCAN_WINDOW % mmap.PAGESIZE == 0)
+                for pos in range(0, size, SCAN_WINDOW):
+                    end = min(pos + SCAN_WINDOW + HEX_KEY_LEN, size)
+                    for m in RE_HEX_RUN.finditer(mm, pos, end):
+                        start, stop = m.span()
+                        if stop - start != HEX_KEY_LEN:
+                            continue
+                        # A hit touching the window edge is only a key if the run really ends there
+                        if start == pos and pos and mm[pos - 1] in _HEX_BYTES:
+                            continue
+                        if stop == end and end < size and mm[end] in _HEX_BYTES:
+                            continue
+                        candidates.add(m.group())
+                    if can_release and end < size:
+                        # Drop scanned pages so RSS stays around one window
+                        mm.madvise(mmap.MADV_DONTNEED, pos, SCAN_WINDOW)
     except Exception as e:
         print(f"[red]Error reading {file_path.name}: {e}[/]")
     return candidates
 
+def _pick_target(zf: zipfile.ZipFile) -> Optional[zipfile.ZipInfo]:
+    """Pick the entry used to verify a password: 'Ver' if present, else the smallest file."""
+    # 'Ver' was the file we used before, but we can try any.
+    # NameToInfo is ZipFile's own name index: a dict lookup instead of building namelist()
+    ver = zf.NameToInfo.get('Ver')
+    if ver is not None:
+        return ver
+    return min((info for info in zf.infolist() if not info.is_dir()),
+               key=lambda x: x.file_size, default=None)
+
+def _check_password(zf: zipfile.ZipFile, target: zipfile.ZipInfo, password: bytes) -> bool:
+    try:
+        # open() rejects ~255/256 wrong keys on the header check byte before
+        # any decompression; survivors get a full read with CRC check
+        with zf.open(target, 'r', pwd=password) as f:
+            f.read()
+        return True
+    except (RuntimeError, zipfile.BadZipFile, zlib.error):
+        return False
+    except Exception:
+        return False
+
 def try_unlock(zip_path: Path, password: bytes) -> bool:
     """Attempts to unlock the zip file with the given password."""
     try:
         with zipfile.ZipFile(zip_path) as zf:
-            # Try to read a small file or the first file to verify password
-            # 'Ver' was the file we used before, but we can try any.
-            # We'll just list namelist -> pick smallest -> try read
-            target = None
-            # Prefer 'Ver' if it exists
-            if 'Ver' in zf.namelist():
-                target = 'Ver'
-            else:
-                # Pick the smallest file
-                infos = sorted(zf.infolist(), key=lambda x: x.file_size)
-                for info in infos:
-                    if not info.is_dir():
-                        target = info.filename
-                        break
-            
-            if not target:
-                return False
-
-            # Force read with crc check
-            zf.open(target, 'r', pwd=password).read()
-            return True
-            
+            target = _pick_target(zf)
+            return target is not None and _check_password(zf, target, password)
     except (RuntimeError, zipfile.BadZipFile, zlib.error):
         return False
     except Exception:
         return False
 
+def find_password(zip_path: Path, keys: Iterable[bytes]) -> Optional[bytes]:
+    """Try candidate keys in turn; return the first one that unlocks zip_path."""
+    keys = list(keys)
+    if not keys:
+        return None
+    try:
+        # Parse the central directory once and reuse it for every candidate.
+        # Keys are tried one at a time: ZipCrypto is pure Python (GIL-bound)
+        # and a ZipFile's file handle can't be shared safely across threads.
+        zf = zipfile.ZipFile(zip_path)
+    except (zipfile.BadZipFile, OSError):
+        return None
+    with zf:
+        target = _pick_target(zf)
+        if target is None:
+            return None
+        for k in keys:
+            if _check_password(zf, target, k):
+                return k
+    return None
+
 def run_find_pwd_tool(console):
     """
     Scans for lsec* binaries and AllAppUpdate.bin to find the password.
@@ -86,8 +170,18 @@ def run_find_pwd_tool(console):
     # 1. Locate AllAppUpdate.bin (target)
     # 2. Locate lsec* files (sources)
     
-    target_files = sorted(start_dir.rglob("AllAppUpdate.bin"))
-    source_files = sorted(list(start_dir.rglob("lsec*update*")) + list(start_dir.rglob("update-binary")))
+    # One walk classifies everything (previously three separate rglob passes)
+    target_files = []
+    source_files = []
+    for entry in iter_files(start_dir):
+        # Case-insensitive, like rglob on Windows (where this is mostly run)
+        lname = entry.name.lower()
+        if lname == "allappupdate.bin":
+            target_files.append(Path(entry.path))
+        elif (lname.startswith("lsec") and "update" in lname[4:]) or lname == "update-binary":
+            source_files.append(Path(entry.path))
+    target_files.sort()
+    source_files.sort()
     
     if not target_files:
         console.print("[yellow]No 'AllAppUpdate.bin' found in this directory tree.[/]")
@@ -105,9 +199,15 @@ def run_find_pwd_tool(console):
         console.print("[yellow]No candidate binary files found to scan. Using known keys only.[/]")
     else:
         console.print(f"\n[bold]Scanning {len(source_files)} binaries for keys...[/]")
-        for src in source_files:
-            console.print(f"Scanning [cyan]{src.name}[/]...", end=" ")
-            keys = find_candidate_strings(src)
+        if len(source_files) > 1:
+            # re holds the GIL, so independent binaries go to separate processes
+            workers = min(len(source_files), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(find_candidate_strings, source_files))
+        else:
+            results = [find_candidate_strings(source_files[0])]
+        for src, keys in zip(source_files, results):
+            console.print(f"  [cyan]{src.name}[/]:", end=" ")
             if keys:
                 console.print(f"[green]Found {len(keys)} candidates[/]")
                 found_keys.update(keys)
@@ -123,15 +223,19 @@ def run_find_pwd_tool(console):
         
     # If we have targets, try to unlock them
     if target_files:
+        pwd_hits = _load_pwd_hits()
         for target in target_files:
             console.print(f"\n[bold]Attempting to crack {target.name}...[/]")
-            success_pwd = None
-            
-            # Try all keys
-            for key in found_keys:
-                if try_unlock(target, key):
-                    success_pwd = key
-                    break
+            fingerprint = _zip_fingerprint(target)
+            cached = pwd_hits.get(fingerprint) if fingerprint else None
+            success_pwd = find_password(target, [cached.encode()]) if cached else None
+            if success_pwd:
+                console.print("[dim]Matched a previously found password.[/]")
+            else:
+                success_pwd = find_password(target, found_keys)
+                if success_pwd and fingerprint:
+                    pwd_hits[fingerprint] = success_pwd.decode('utf-8')
+                    _save_pwd_hits(pwd_hits)
             
             if success_pwd:
                 console.print(Panel(f"[bold green]SUCCESS![/]\n\nFile: {target}\nPassword: [bold yellow]{success_pwd.decode('utf-8')}[/]", border_style="green"))
@@ -141,7 +245,8 @@ def run_find_pwd_tool(console):
                 if Confirm.ask(f"Extract now to [cyan]{extract_dir.name}[/]?", default=True):
                     try:
                         with zipfile.ZipFile(target) as zf:
-                            zf.extractall(extract_dir, pwd=success_pwd)
+                            for info in zf.infolist():
+                                extract_member(zf, info, extract_dir, pwd=success_pwd)
                         console.print(f"[green]Extracted to {extract_dir}[/]")
                     except Exception as e:
                         console.print(f"[red]Extraction failed: {e}[/]")
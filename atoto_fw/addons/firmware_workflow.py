@@ -13,8 +13,10 @@ add-ons launcher which calls funcs as: func(console=console).
 
 from __future__ import annotations
 
+import os
 import re
 import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from typing import Iterable, List, Optional
 
@@ -26,6 +28,7 @@ from rich import box
 
 # Add-on registry
 from . import register
+from .extract_zip import extract_member, iter_files
 
 # Optional import: OTA extractor (we’ll show a friendly message if missing)
 try:
@@ -36,6 +39,9 @@ except Exception:  # pragma: no cover
 
 # ───────────────────────── helpers ─────────────────────────
 
+_PAT_6315 = re.compile(r"^6315[_-].*\.zip$", re.IGNORECASE)
+_PAT_MCU = re.compile(r"mcu", re.IGNORECASE)
+
 def _sec(console: Console, title: str, subtitle: str = "") -> None:
     msg = f"[bold]{title}[/]"
     if subtitle:
@@ -44,41 +50,73 @@ def _sec(console: Console, title: str, subtitle: str = "") -> None:
 
 def _list_zip_files(root: Path, recursive: bool) -> List[Path]:
     if recursive:
-        return [p for p in root.rglob("*.zip") if p.is_file()]
-    else:
-        return [p for p in root.glob("*.zip") if p.is_file()]
+        return [Path(e.path) for e in iter_files(root)
+                if e.name.lower().endswith(".zip") and e.is_file()]
+    with os.scandir(root) as it:
+        return [Path(e.path) for e in it
+                if e.name.lower().endswith(".zip") and e.is_file()]
+
+def _extract_one(zpath: str, dest: str) -> str:
+    """Extract one zip into dest. Module-level so ProcessPoolExecutor can pickle it."""
+    with zipfile.ZipFile(zpath, "r") as zf:
+        for info in zf.infolist():
+            extract_member(zf, info, Path(dest))
+    return dest
 
 def _extract_zip(console: Console, zpath: Path, dest: Optional[Path] = None) -> Path:
     """Extract zpath to dest (defaults to sibling folder named after stem)."""
     dest = dest or (zpath.parent / zpath.stem)
     dest.mkdir(parents=True, exist_ok=True)
-    with zipfile.ZipFile(zpath, "r") as zf:
-        zf.extractall(dest)
+    _extract_one(str(zpath), str(dest))
     console.print(f"[green]✓[/] Extracted: [bold]{zpath.name}[/] → {dest}")
     return dest
 
+def _extract_many(console: Console, base: Path, zips: List[Path]) -> None:
+    """Extract independent zips in parallel, one process per zip (up to CPU count)."""
+    def label(z: Path) -> str:
+        try:
+            return str(z.relative_to(base))
+        except ValueError:
+            return str(z)
+
+    if len(zips) == 1:
+        try:
+            _extract_zip(console, zips[0])
+        except Exception as ex:
+            console.print(f"[red]![/] Failed to extract {label(zips[0])}: {ex}")
+        return
+
+    workers = min(len(zips), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = {}
+        for z in zips:
+            dest = z.parent / z.stem
+            dest.mkdir(parents=True, exist_ok=True)
+            jobs[pool.submit(_extract_one, str(z), str(dest))] = z
+        for fut in as_completed(jobs):
+            z = jobs[fut]
+            try:
+                dest = fut.result()
+                console.print(f"[green]✓[/] Extracted: [bold]{z.name}[/] → {dest}")
+            except Exception as ex:
+                console.print(f"[red]![/] Failed to extract {label(z)}: {ex}")
+
 def _filter_mcu_zip_candidates(paths: Iterable[Path]) -> List[Path]:
     """
     Heuristics for 'MCU' / inner payload zips.
     We keep files whose name looks like '6315_*.zip' OR live under a plausible extracted folder.
     """
     out: List[Path] = []
-    pat_6315 = re.compile(r"^6315[_-].*\.zip$", re.IGNORECASE)
     for p in paths:
         name = p.name
-        if pat_6315.match(name):
+        if _PAT_6315.match(name):
             out.append(p)
             continue
         # also accept generic inner payload zips that are not the outer firmware names
-        if p.parent.name not in ("manual", "docs") and "MCU" in name.upper():
+        if p.parent.name not in ("manual", "docs") and _PAT_MCU.search(name):
             out.append(p)
     # de-dup while preserving order
-    seen = set()
-    uniq: List[Path] = []
-    for p in out:
-        if p not in seen:
-            uniq.append(p); seen.add(p)
-    return uniq
+    return list(dict.fromkeys(out))
 
 def _choose_dir(console: Console, prompt: str, default: Path) -> Path:
     s = Prompt.ask(prompt, default=str(default)).strip()
@@ -105,11 +143,7 @@ def _step1_extract_top(console: Console, base: Path) -> None:
     if not Confirm.ask("Extract all of these here?", default=True):
         return
 
-    for z in zips:
-        try:
-            _extract_zip(console, z)
-        except Exception as ex:
-            console.print(f"[red]![/] Failed to extract {z.name}: {ex}")
+    _extract_many(console, base, zips)
 
 def _step2_extract_nested(console: Console, base: Path) -> None:
     _sec(console, "Step 2 — Extract nested MCU ZIP(s)", "Search is recursive from the chosen folder.")
@@ -132,11 +166,7 @@ def _step2_extract_nested(console: Console, base: Path) -> None:
     if not Confirm.ask("Extract ALL nested zips?", default=True):
         return
 
-    for z in zips:
-        try:
-            _extract_zip(console, z)
-        except Exception as ex:
-            console.print(f"[red]![/] Failed to extract {z}: {ex}")
+    _extract_many(console, base, zips)
 
 def _step3_run_ota_extract(console: Console, base: Path) -> None:
     _sec(console, "Step 3 — OTA extractor (.new.dat.br → .dat → .img)")
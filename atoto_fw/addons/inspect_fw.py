@@ -8,8 +8,9 @@ Helps users distinguish between modifiable images and raw hardware binaries.
 """
 from __future__ import annotations
 import os
+import re
 from pathlib import Path
-from fnmatch import fnmatch
+from fnmatch import translate
 from typing import List, Dict, Tuple
 
 from rich.console import Console
@@ -63,19 +64,26 @@ KNOWLEDGE_BASE = [
     ("*.img", "Unknown Image", "Likely a filesystem image.", "white"),
 ]
 
+# All globs folded into one regex, one named group per entry. Alternatives are
+# tried in order, so the first group that matches is still the first KB match.
+_KB_REGEX = re.compile("|".join(
+    f"(?P<kb{i}>{translate(entry[0])})" for i, entry in enumerate(KNOWLEDGE_BASE)
+))
+
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
 def format_size(size: int) -> str:
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if size < 1024:
-            return f"{size:.1f} {unit}"
-        size /= 1024
-    return f"{size:.1f} TB"
+    # Unit index straight from the bit length: every 10 bits is one 1024 step
+    idx = min(max(size.bit_length() - 1, 0) // 10, len(_SIZE_UNITS) - 1)
+    return f"{size / (1 << (10 * idx)):.1f} {_SIZE_UNITS[idx]}"
 
 def identify_file(filename: str) -> Tuple[str, str, str]:
     """Return (Type, Description, Color) for a filename."""
     name_lower = filename.lower()
-    for pattern, ftype, desc, color in KNOWLEDGE_BASE:
-        if fnmatch(name_lower, pattern):
-            return ftype, desc, color
+    m = _KB_REGEX.match(name_lower)
+    if m:
+        _, ftype, desc, color = KNOWLEDGE_BASE[int(m.lastgroup[2:])]
+        return ftype, desc, color
     return "File", "Unknown file type.", "white"
 
 def _addon_inspect(console: Console, **kwargs):
@@ -90,7 +98,9 @@ def _addon_inspect(console: Console, **kwargs):
     root = Path(root_str)
     
     # 2. Scan
-    files = sorted([p for p in root.iterdir() if p.is_file()])
+    # scandir keeps the type/stat info from the listing, so each entry costs one stat at most
+    with os.scandir(root) as it:
+        files = sorted((e.name, e.stat().st_size) for e in it if e.is_file())
     if not files:
         console.print("[yellow]Folder is empty.[/]")
         Confirm.ask("Back", default=True)
@@ -105,12 +115,12 @@ def _addon_inspect(console: Console, **kwargs):
 
     # Group by broad category for nicer sorting? Nah, name sort is fine.
     
-    for p in files:
-        ftype, desc, color = identify_file(p.name)
-        sz = format_size(p.stat().st_size)
+    for name, size in files:
+        ftype, desc, color = identify_file(name)
+        sz = format_size(size)
         
         table.add_row(
-            p.name,
+            name,
             sz,
             f"[{color}]{ftype}[/]",
             desc
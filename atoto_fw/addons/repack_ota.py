@@ -6,34 +6,74 @@ atoto_fw.addons.repack_ota
 Add-on: Repack raw .img files into Android OTA formats (.new.dat.br + .transfer.list).
 """
 from __future__ import annotations
+import io
 import os
 import math
-import struct
+import mmap
+import queue
+import re
+import shutil
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
 try:
     import brotli
 except ImportError:
-    brotli = None
+    try:
+        import brotlicffi as brotli  # pip install brotlicffi
+    except ImportError:
+        brotli = None
 
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, DownloadColumn, TimeRemainingColumn
-from rich.prompt import Prompt, Confirm
-from ..tui import Menu, FolderPicker, section, safe_filename
+from rich.progress import Progress, TextColumn, BarColumn, DownloadColumn, TimeRemainingColumn
+from rich.prompt import Confirm
+from ..core.config import load_cfg
+from ..tui import Menu, FolderPicker, section
 from . import register
 
 VERSION = 4
 BLOCK_SIZE = 4096
+COMPRESS_CHUNK = 1024 * 1024
+_RESIZE_RX = re.compile(r"^\s*resize\s+(\w+)\s+(\d+)")
+# Shared zero padding, sliced (no copy) instead of allocating b'\x00' * n per image
+_ZERO_CHUNK = bytes(COMPRESS_CHUNK)
+_ZERO_VIEW = memoryview(_ZERO_CHUNK)
+# Verify feeds the decompressor small slices: zero runs inflate enormously
+VERIFY_CHUNK = 16 * 1024
+# 4 keeps most of q6's ratio at a fraction of the time; 11 is max (slow).
+# Users pick their own in Settings ("brotli_quality").
+DEFAULT_QUALITY = 4
+
+def _cfg_quality() -> int:
+    try:
+        q = int(load_cfg().get("brotli_quality", DEFAULT_QUALITY))
+    except (TypeError, ValueError):
+        return DEFAULT_QUALITY
+    return min(max(q, 0), 11)
 
 def is_sparse_image(filepath: Path) -> bool:
     """Check for Android Sparse Image magic header (0xED26FF3A)."""
     try:
-        with open(filepath, 'rb') as f:
-            magic = f.read(4)
-            return magic == b'\x3a\xff\x26\xed'
+        # Raw fd + positional read: one open/read/close, no buffered file object
+        fd = os.open(filepath, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            magic = os.pread(fd, 4, 0) if hasattr(os, "pread") else os.read(fd, 4)
+        finally:
+            os.close(fd)
+        return magic == b'\x3a\xff\x26\xed'
     except Exception:
         return False
 
+def batch_sparse_check(paths: List[Path]) -> Dict[Path, bool]:
+    """is_sparse_image() for many files at once; the cost is syscall latency, so use threads."""
+    if not paths:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(16, len(paths))) as pool:
+        return dict(zip(paths, pool.map(is_sparse_image, paths)))
+
 def write_transfer_list(path: Path, count: int):
     """Write a v4 transfer.list for a full new image (type 'new')."""
     # Header:
@@ -52,45 +92,159 @@ def write_transfer_list(path: Path, count: int):
         f.write("0\n")
         f.write(f"new 2,0,{count}\n")
 
-def compress_file(console: Console, src: Path, dst: Path):
-    """Compress src to dst using Brotli with progress bar."""
+class _BackgroundWriter:
+    """
+    Writes chunks to a file on a helper thread so Brotli can work on the next
+    chunk while the previous one is flushed. The bounded queue caps memory.
+    """
+    def __init__(self, fout, depth: int = 4):
+        self._fout = fout
+        self._q: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=depth)
+        self.error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            buf = self._q.get()
+            if buf is None:
+                return
+            if self.error is None:  # after a failure keep draining so put() never blocks
+                try:
+                    self._fout.write(buf)
+                except BaseException as e:
+                    self.error = e
+
+    def write(self, buf: bytes):
+        if self.error is not None:
+            raise self.error
+        if buf:
+            self._q.put(buf)
+
+    def close(self):
+        """Flush everything queued and stop the thread; re-raises a write error."""
+        self._q.put(None)
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+def compress_file(console: Console, src: Path, dst: Path, pad_len: int = 0,
+                  quality: int = DEFAULT_QUALITY, src_size: Optional[int] = None) -> Optional[int]:
+    """
+    Compress src (plus pad_len trailing zero bytes) to dst using Brotli with progress bar.
+    Returns the CRC32 of the uncompressed (padded) stream, or None on failure.
+    """
     if not brotli:
         console.print("[red]Error:[/] Brotli module not installed. Cannot compress.")
-        return False
+        return None
 
-    total_size = src.stat().st_size
-    
-    # Brotli one-shot is easiest for now, but no progress for the compression itself easily 
-    # unless we use a chunked compressor. 
-    # Standard brotli.compress is bytes->bytes.
-    # brotli.Compressor allows streaming.
+    if src_size is None:
+        src_size = src.stat().st_size
+    total_size = src_size + pad_len
     
-    console.print(f"  - Reading [bold]{src.name}[/] ({total_size/1024/1024:.1f} MB)...")
-    with open(src, 'rb') as f:
-        data = f.read()
-
-    console.print(f"  - Compressing to [bold]{dst.name}[/]...")
-    # There is no easy progress callback for brotli.compress. 
-    # We'll just show a spinner.
+    # brotli.Compressor streams, so memory stays at one chunk instead of the
+    # whole image, and we finally get a real progress bar.
+    console.print(f"  - Compressing [bold]{src.name}[/] ({total_size/1024/1024:.1f} MB) to [bold]{dst.name}[/]...")
     try:
-        compressed = brotli.compress(data, quality=6) # 6 is default, 11 is max (slow)
-        with open(dst, 'wb') as f:
-            f.write(compressed)
-        return True
+        comp = brotli.Compressor(quality=quality)
+        # brotli calls it process(); older brotlicffi only has compress()
+        step = getattr(comp, "process", None) or comp.compress
+        with open(src, 'rb') as fin, open(dst, 'wb') as dst_file, Progress(
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            DownloadColumn(),
+            TimeRemainingColumn(),
+            console=console
+        ) as progress:
+            task = progress.add_task("Compressing", total=total_size)
+            # Disk writes go to a helper thread while Brotli works on the next chunk
+            fout = _BackgroundWriter(dst_file)
+            try:
+                # CRC rides along on the same pass, so verification costs no extra read
+                crc = 0
+                if src_size:  # mmap can't map an empty file
+                    # Feed the compressor slices of the page cache: no per-chunk read() copy
+                    with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                            mm.madvise(mmap.MADV_SEQUENTIAL)  # aggressive read-ahead
+                        with memoryview(mm) as view:
+                            for off in range(0, src_size, COMPRESS_CHUNK):
+                                with view[off:off + COMPRESS_CHUNK] as chunk:
+                                    crc = zlib.crc32(chunk, crc)
+                                    fout.write(step(chunk))
+                                    progress.advance(task, len(chunk))
+                remaining = pad_len
+                while remaining > 0:
+                    n = min(remaining, len(_ZERO_CHUNK))
+                    crc = zlib.crc32(_ZERO_VIEW[:n], crc)
+                    fout.write(step(_ZERO_VIEW[:n]))
+                    remaining -= n
+                progress.advance(task, pad_len)
+                fout.write(comp.finish())
+            finally:
+                fout.close()
+        return crc
     except Exception as e:
         console.print(f"[red]Compression failed:[/] {e}")
+        return None
+
+def verify_br(console: Console, br_path: Path, expected_crc: int) -> bool:
+    """Decompress br_path and check the CRC32 of its output against expected_crc."""
+    try:
+        dec = brotli.Decompressor()
+        # brotli calls it process(); brotlicffi also has decompress()
+        step = getattr(dec, "process", None) or dec.decompress
+        # brotli >= 1.2 can cap each output buffer, so a long zero run is
+        # drained in ~COMPRESS_CHUNK pieces instead of inflating all at once
+        bounded = hasattr(dec, "can_accept_more_data")
+        crc = 0
+        with open(br_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(VERIFY_CHUNK), b""):
+                if not bounded:
+                    crc = zlib.crc32(step(chunk), crc)
+                    continue
+                out = dec.process(chunk, output_buffer_limit=COMPRESS_CHUNK)
+                while out:
+                    crc = zlib.crc32(out, crc)
+                    out = dec.process(b"", output_buffer_limit=COMPRESS_CHUNK)
+        if hasattr(dec, "is_finished") and not dec.is_finished():
+            console.print(f"[red]Verification failed:[/] {br_path.name} is truncated")
+            return False
+    except Exception as e:
+        console.print(f"[red]Verification failed:[/] {e}")
         return False
+    if crc != expected_crc:
+        console.print(f"[red]Verification failed:[/] {br_path.name} crc32 {crc:08x}, expected {expected_crc:08x}")
+        return False
+    return True
+
+def write_padded_dat(src: Path, dst: Path, pad_len: int):
+    """Write src to dst followed by pad_len zero bytes (uncompressed .new.dat)."""
+    # copyfile uses the kernel fast paths (sendfile / fcopyfile) where it can
+    shutil.copyfile(src, dst)
+    if pad_len > 0:
+        # Extending past EOF leaves a hole that reads back as zeros: no pad bytes written
+        with open(dst, 'r+b') as fout:
+            fout.truncate(fout.seek(0, os.SEEK_END) + pad_len)
 
-def repack_image(console: Console, target_img: Path) -> Optional[Path]:
-    """Repack a single image. Returns path to temp .dat file if successful, else None."""
+def repack_image(console: Console, target_img: Path, quality: int = DEFAULT_QUALITY,
+                 size: Optional[int] = None, is_sparse: Optional[bool] = None) -> Optional[Path]:
+    """
+    Repack a single image. Returns path to the .new.dat.br if successful, else None.
+    Pass size / is_sparse if the caller already stat'ed / probed the image.
+    """
     # Check sparse
-    if is_sparse_image(target_img):
+    if is_sparse is None:
+        is_sparse = is_sparse_image(target_img)
+    if is_sparse:
         console.print(f"[red]Error:[/] [bold]{target_img.name}[/] is a Sparse Image. Repacking requires RAW.")
         return None
             
     # Calculate info
-    size = target_img.stat().st_size
+    if size is None:
+        size = target_img.stat().st_size
     blocks = math.ceil(size / BLOCK_SIZE)
+    pad_len = (blocks * BLOCK_SIZE) - size
     
     base_name = target_img.stem
     root = target_img.parent
@@ -98,6 +252,7 @@ def repack_image(console: Console, target_img: Path) -> Optional[Path]:
     out_patch = root / f"{base_name}.patch.dat"
     out_new_dat = root / f"{base_name}.new.dat"
     out_br = root / f"{base_name}.new.dat.br"
+    out_manifest = root / f"{base_name}.manifest"
     
     console.print(f"\nProcessing [bold cyan]{base_name}[/] ...")
     
@@ -109,28 +264,40 @@ def repack_image(console: Console, target_img: Path) -> Optional[Path]:
     with open(out_patch, 'wb') as f:
         f.write(b"NEWPATCH")
 
-    # 3. Create .new.dat (Padded)
-    console.print(f"  - Creating [bold]{out_new_dat.name}[/] (padded)...")
-    pad_len = (blocks * BLOCK_SIZE) - size
-    
-    with open(target_img, 'rb') as fin, open(out_new_dat, 'wb') as fout:
-        while True:
-            chunk = fin.read(1024*1024)
-            if not chunk: break
-            fout.write(chunk)
-        if pad_len > 0:
-            fout.write(b'\x00' * pad_len)
-            
-    # 4. Compress
-    if compress_file(console, out_new_dat, out_br):
-        console.print(f"  - [green]Success![/] Created {out_br.name}")
-        return out_new_dat
-    else:
-        # Failed, but maybe kept .dat
+    if not brotli:
+        # Can't compress: leave the padded .new.dat as the result
+        console.print(f"  - Creating [bold]{out_new_dat.name}[/] (padded)...")
+        write_padded_dat(target_img, out_new_dat, pad_len)
+        return None
+
+    # 3. Compress the image straight to .new.dat.br, padding on the fly.
+    # The padded .new.dat never touches the disk.
+    crc = compress_file(console, target_img, out_br, pad_len=pad_len, quality=quality, src_size=size)
+    if crc is None:
         return None
+    # Transport check for the unpacked .new.dat (not a signature): read the
+    # .br back and compare against the CRC taken on the compression pass
+    console.print(f"  - Verifying [bold]{out_br.name}[/]...")
+    if not verify_br(console, out_br, crc):
+        return None
+    with open(out_manifest, 'w', newline='\n') as f:
+        f.write(f"blocks={blocks}\n")
+        f.write(f"crc32={crc:08x}\n")
+    console.print(f"  - [green]Success![/] Created {out_br.name} [dim](crc32 {crc:08x}, see {out_manifest.name})[/]")
+    return out_br
+
+def _repack_worker(target_img: str, quality: int, size: int,
+                   is_sparse: Optional[bool] = None) -> Tuple[Optional[str], str]:
+    """
+    Process-pool entry point: repack one image with a captured console.
+    Returns (.new.dat.br path or None, the console output to replay).
+    """
+    out = io.StringIO()
+    res = repack_image(Console(file=out, width=100), Path(target_img), quality, size, is_sparse)
+    return (str(res) if res else None), out.getvalue()
 
-def _update_op_list(console: Console, root: Path):
-    """Scan and update dynamic_partitions_op_list with actual .img sizes."""
+def _update_op_list(console: Console, root: Path, sizes: Optional[Dict[Path, int]] = None):
+    """Scan and update dynamic_partitions_op_list with actual .img sizes (sizes: already known ones)."""
     op_file = root / "dynamic_partitions_op_list"
     if not op_file.exists():
         return
@@ -144,20 +311,21 @@ def _update_op_list(console: Console, root: Path):
 
     new_lines = []
     changes = 0
-    import re
 
     for line in lines:
         # Looking for: resize <partition> <size>
         # e.g. "resize system 1168039936"
-        match = re.match(r"^\s*resize\s+(\w+)\s+(\d+)", line)
+        match = _RESIZE_RX.match(line)
         if match:
             part_name = match.group(1)
             old_size = int(match.group(2))
             
             # Check if we have a matching .img
             img_path = root / f"{part_name}.img"
-            if img_path.exists():
+            actual_size = sizes.get(img_path) if sizes else None
+            if actual_size is None and img_path.exists():
                 actual_size = img_path.stat().st_size
+            if actual_size is not None:
                 if actual_size != old_size:
                     console.print(f"  - Updating [cyan]{part_name}[/]: {old_size} -> [bold green]{actual_size}[/]")
                     new_lines.append(f"resize {part_name} {actual_size}")
@@ -193,19 +361,29 @@ def _addon_repack(console: Console, **kwargs):
     root = Path(root_str)
     
     # Scan for .img
-    imgs = sorted([p for p in root.glob("*.img") if not p.name.endswith("_raw.img")])
+    # One scandir pass; the size comes from the entry's stat and is shared by
+    # the menu, the repack and the op list update. normcase keeps glob's
+    # case-insensitive match on Windows.
+    with os.scandir(root) as it:
+        sizes = {root / e.name: e.stat().st_size for e in it
+                 if os.path.normcase(e.name).endswith(".img")
+                 and not e.name.endswith("_raw.img") and e.is_file()}
+    imgs = sorted(sizes)
     if not imgs:
         console.print("[yellow]No .img files found in folder.[/]")
         Confirm.ask("Back", default=True)
         return
 
     # Menu
+    sparse = batch_sparse_check(imgs)
     items = []
     for p in imgs:
-        sz = p.stat().st_size / (1024*1024)
+        sz = sizes[p] / (1024*1024)
         name_lower = p.name.lower()
         note = ""
-        if "boot.img" in name_lower or "dtbo.img" in name_lower:
+        if sparse[p]:
+            note = " [red](sparse - convert to raw first)[/]"
+        elif "boot.img" in name_lower or "dtbo.img" in name_lower:
             note = " [yellow](Warning: usually stays as .img)[/]"
         
         items.append((f"{p.name} [dim]({sz:.1f} MB)[/]{note}", p))
@@ -217,31 +395,37 @@ def _addon_repack(console: Console, **kwargs):
         return
 
     # Batch Process
-    temp_dats: List[Path] = []
     processed_imgs: List[Path] = [] # Track successfully processed images
     
+    quality = _cfg_quality()
     console.line()
-    console.print(f"Selected {len(selected_imgs)} files.")
+    console.print(f"Selected {len(selected_imgs)} files. [dim](Brotli quality {quality})[/]")
     
-    for img in selected_imgs:
-        res = repack_image(console, img)
+    if len(selected_imgs) == 1:
+        img = selected_imgs[0]
+        res = repack_image(console, img, quality, sizes[img], sparse[img])
         if res:
-            temp_dats.append(res)
             processed_imgs.append(img)
-            
-    # Auto-update dynamic_partitions_op_list
-    _update_op_list(console, root)
-
-    # Cleanup .dat (intermediate)
-    if temp_dats:
-        console.line()
-        if Confirm.ask(f"Process complete. Delete {len(temp_dats)} intermediate .dat files?", default=True):
-            for p in temp_dats:
+    else:
+        # Brotli is CPU-bound and each image writes its own files: one process per image
+        workers = min(len(selected_imgs), os.cpu_count() or 1)
+        console.print(f"[dim]Repacking in parallel ({workers} workers)...[/]")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = {pool.submit(_repack_worker, str(img), quality, sizes[img], sparse[img]): img
+                    for img in selected_imgs}
+            for fut in as_completed(jobs):
+                img = jobs[fut]
                 try:
-                    os.remove(p)
-                    console.print(f"  - Deleted {p.name}")
+                    res, log = fut.result()
                 except Exception as e:
-                    console.print(f"  - Failed to delete {p.name}: {e}")
+                    console.print(f"[red]Failed to repack {img.name}:[/] {e}")
+                    continue
+                console.print(log, end="", markup=False, highlight=False)
+                if res:
+                    processed_imgs.append(img)
+            
+    # Auto-update dynamic_partitions_op_list
+    _update_op_list(console, root, sizes)
 
     # Cleanup .img (original)
     if processed_imgs:
@@ -3,8 +3,8 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
-from .ui import main_menu, run_search_download_flow, manual_url_flow
-from .core import setup_logging
+# ui/core pull in Rich and the network stack; they're imported inside main()
+# so --help / --version (and argument errors) return without loading them.
 
 def parse_args():
     from . import __version__
@@ -21,16 +21,19 @@ def parse_args():
 
 def main():
     args = parse_args()
+    from .core import setup_logging
     setup_logging(verbose=args.verbose)
     out_dir = Path(args.out)
     out_dir.mkdir(parents=True, exist_ok=True)
 
     # CLI mode
     if args.manual:
+        from .ui import manual_url_flow
         manual_url_flow(out_dir / "manual")
         return
         
     if args.model:
+        from .ui import run_search_download_flow
         p = {
             "name": "CLI",
             "model": args.model,
@@ -42,4 +45,5 @@ def main():
         run_search_download_flow(p, out_dir, args.verbose, deep_scan=args.deep)
         return
 
+    from .ui import main_menu
     main_menu(out_dir)
@@ -1,13 +1,43 @@
 from __future__ import annotations
-from typing import Any, Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
 from .discovery.normalize import normalize_candidates
 from .discovery.api import fetch_api_packages
-from .discovery.json_probe import discover_packages_via_json
+from .discovery.json_probe import discover_packages_for_models
 from .discovery.mirrors import known_links_for_model
 from .discovery.hcn_scraper import fetch_hcn_server_packages
 from .grouping import dedupe_rows, sort_rows
 
+# Quick scans stop probing the API after this many candidates return packages;
+# candidates are ranked best-first, so the tail rarely adds anything. Deep scans
+# still query every candidate.
+API_HIT_LIMIT = 1
+API_WORKERS = 8  # stays within the shared SESSION's pool (http.POOL_SIZE)
+
+def _api_sweep(cands: List[str], mcu: str, include_beta: bool, limit: Optional[int],
+               progress=None) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Query the API for all candidates concurrently and return (cand, pkgs) for
+    those with packages, in candidate order. With a limit, stop after that many
+    hits and cancel the requests that haven't started yet.
+    """
+    if not cands:
+        return []
+    found: List[Tuple[str, List[Dict[str, Any]]]] = []
+    total = len(cands)
+    with ThreadPoolExecutor(max_workers=min(API_WORKERS, total)) as ex:
+        futs = [ex.submit(fetch_api_packages, c, mcu, include_beta=include_beta) for c in cands]
+        for j, (cand, fut) in enumerate(zip(cands, futs), start=1):
+            if progress: progress(f"API {j}/{total} @ {cand}")
+            pkgs = fut.result()
+            if pkgs:
+                found.append((cand, pkgs))
+                if limit and len(found) >= limit:
+                    for f in futs: f.cancel()
+                    break
+    return found
+
 def try_lookup(model: str, mcu: str, progress=None, deep_scan: bool = False, include_beta: bool = False) -> Tuple[List[Dict[str,Any]], List[str]]:
     cands = normalize_candidates(model)
     hits: List[str] = []
@@ -45,34 +75,24 @@ def try_lookup(model: str, mcu: str, progress=None, deep_scan: bool = False, inc
             for _c in ("Z7G2A7PE", "Z7G2A7", "Z7G2", "Z7"):
                 if _c not in cands: cands.append(_c)
 
-    # ── API probe (all candidates) ────────────────────────────────────────────
-    total = len(cands) or 1
-    for j, cand in enumerate(cands, start=1):
-        if progress: progress(f"API {j}/{total} @ {cand}")
-        pkgs = fetch_api_packages(cand, mcu, include_beta=include_beta)
-        if pkgs:
-            for p in pkgs:
-                p.setdefault("source", "API")
-                q = p.copy(); q["title"] = f"[{cand}] {q['title']}"
-                merged.append(q)
-            hits.append(cand)
+    # ── API probe (all candidates on deep scan, else until API_HIT_LIMIT) ────
+    limit = None if deep_scan else API_HIT_LIMIT
+    api_found = _api_sweep(cands, mcu, include_beta, limit, progress)
 
     # ── MCU retry: if nothing found and MCU was set, retry without it ─────────
-    if not merged and mcu:
+    if not merged and not api_found and mcu:
         if progress: progress("No results with MCU filter — retrying without MCU…")
-        for j, cand in enumerate(cands, start=1):
-            pkgs = fetch_api_packages(cand, "", include_beta=include_beta)
-            if pkgs:
-                for p in pkgs:
-                    p.setdefault("source", "API")
-                    q = p.copy(); q["title"] = f"[{cand}] {q['title']}"
-                    merged.append(q)
-                hits.append(cand)
-
-    # ── JSON probe (all candidates, all endpoints — seen_eps avoids repeats) ──
-    seen_eps: set = set()
-    for j, cand in enumerate(cands, start=1):
-        pkgs_json, endpoint = discover_packages_via_json(cand, progress=progress, seen_endpoints=seen_eps)
+        api_found = _api_sweep(cands, "", include_beta, limit)
+
+    for cand, pkgs in api_found:
+        for p in pkgs:
+            p.setdefault("source", "API")
+            q = p.copy(); q["title"] = f"[{cand}] {q['title']}"
+            merged.append(q)
+        hits.append(cand)
+
+    # ── JSON probe (all candidates, all endpoints, one concurrent batch) ─────
+    for cand, pkgs_json in discover_packages_for_models(cands, progress=progress):
         if pkgs_json:
             for p in pkgs_json:
                 if not p["title"].startswith("["):
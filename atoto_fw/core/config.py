@@ -2,6 +2,7 @@
 from __future__ import annotations
 import json
 import os
+import shutil
 from pathlib import Path
 from typing import Any, Dict
 
@@ -14,6 +15,8 @@ DEFAULT_CFG: Dict[str, Any] = {
     "verbose": False,              # extra logging in UI
     "auto_open_folder": False,     # open folder automatically after download
     "include_beta": False,         # include beta/pre-release firmware in search results
+    "verify_zip_crc": True,        # unzip add-on: check CRC-32 of every extracted member
+    "brotli_quality": 4,           # repack add-on: 0 (fastest) .. 11 (smallest output)
     "history": [],                 # list of download records (newest first, capped at 50)
 }
 
@@ -101,13 +104,17 @@ def add_history_entry(cfg: Dict[str, Any], entry: Dict[str, Any]) -> None:
 
 def save_cfg(cfg: Dict[str, Any]) -> None:
     p = config_path()
-    tmp = p.with_suffix(".tmp")
+    tmp = p.with_suffix(".json.tmp")
     data = _merge_defaults(cfg)
-    # Atomic-ish write
-    tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    # Compact JSON: this runs on every profile/history change
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(json.dumps(data, separators=(",", ":"), ensure_ascii=False))
+        f.flush()
+        os.fsync(f.fileno())
     try:
         if p.exists():
-            p.replace(p.with_suffix(".bak.json"))
+            shutil.copyfile(p, p.with_suffix(".bak.json"))
     except Exception:
         pass
-    tmp.replace(p)
+    # Atomic swap: config.json is always either the old or the new file
+    os.replace(tmp, p)
@@ -1,18 +1,25 @@
 # atoto_fw/core/discovery/__init__.py
 
-from .api import fetch_api_packages
-from .json_probe import discover_packages_via_json
+from .api import fetch_api_packages, _IBOOK_CACHE
+from .json_probe import discover_packages_for_models
 from .mirrors import known_links_for_model
 from .normalize import normalize_candidates, build_suggestions, series_from_model
 from .hcn_scraper import fetch_hcn_server_packages
+from ..utils import clear_http_caches
+
+def clear_caches() -> None:
+    """Drop the cached API/JSON/HEAD answers (e.g. after a profile edit)."""
+    _IBOOK_CACHE.clear()
+    clear_http_caches()
 
 __all__ = [
     "fetch_api_packages",
-    "discover_packages_via_json",
+    "discover_packages_for_models",
     "known_links_for_model",
     "normalize_candidates",
     "build_suggestions",
     "series_from_model",
     "fetch_hcn_server_packages",
+    "clear_caches",
 ]
 
@@ -1,11 +1,13 @@
 from __future__ import annotations
-import re
-from typing import Any, Dict, List
+import time
+from typing import Any, Dict, List, Tuple
 from ..http import SESSION
-from ..utils import dig, url_leaf_name
+from ..utils import JSON_TTL, json_loads, url_leaf_name, version_from_name
 
 BASE = "https://resources.myatoto.com/atoto-product-ibook/ibMobile"
 API_GET_IBOOK_LIST = f"{BASE}/getIbookList"
+# getIbookList answers per (model, mcu, iBookType), reused for JSON_TTL seconds
+_IBOOK_CACHE: Dict[Tuple[str, str, int], Tuple[float, Any]] = {}
 
 def _parse_ibook_response(data: Any) -> List[Dict[str, Any]]:
     if not isinstance(data, dict):
@@ -14,18 +16,19 @@ def _parse_ibook_response(data: Any) -> List[Dict[str, Any]]:
     if code not in (None, 0, "0", 200, "200"):
         return []
     pkgs: List[Dict[str, Any]] = []
-    soc_url = dig(data, "data", "softwareVo", "socVo", "socUrl")
+    # Walk the shared data.softwareVo.socVo prefix once; non-dicts read as empty
+    inner = data.get("data")
+    inner = inner if isinstance(inner, dict) else {}
+    sw = inner.get("softwareVo")
+    sw = sw if isinstance(sw, dict) else {}
+    soc = sw.get("socVo")
+    soc = soc if isinstance(soc, dict) else {}
+    soc_url = soc.get("socUrl")
     if isinstance(soc_url, str) and soc_url.startswith("http"):
         title = url_leaf_name(soc_url)
-        ver = re.findall(r'([rv]?[\d._-]+)', title.replace(" ", ""))[:1] or ["N/A"]
-        pkgs.append({"id": "1", "title": title, "version": ver[0], "date": "", "size": None,
+        pkgs.append({"id": "1", "title": title, "version": version_from_name(title), "date": "", "size": None,
                      "url": soc_url, "hash": "", "source": "API"})
-    for arr in (
-        dig(data, "data", "softwareVo", "fileList"),
-        dig(data, "data", "softwareVo", "socVo", "files"),
-        dig(data, "data", "files"),
-        dig(data, "files"),
-    ):
+    for arr in (sw.get("fileList"), soc.get("files"), inner.get("files"), data.get("files")):
         if isinstance(arr, list):
             for e in arr:
                 if not isinstance(e, dict):
@@ -46,16 +49,27 @@ def _parse_ibook_response(data: Any) -> List[Dict[str, Any]]:
     return pkgs
 
 
+def _get_ibook_list(model: str, mcu_version: str, ibook_type: int) -> Any:
+    """One getIbookList call. Successful responses are cached for JSON_TTL seconds."""
+    key = (model, mcu_version, ibook_type)
+    now = time.monotonic()
+    hit = _IBOOK_CACHE.get(key)
+    if hit is not None and now - hit[0] < JSON_TTL:
+        return hit[1]
+    params = {"skuModel": model, "mcuVersion": mcu_version, "langType": 1, "iBookType": ibook_type}
+    r = SESSION.get(API_GET_IBOOK_LIST, params=params, timeout=15)
+    r.raise_for_status()
+    data = json_loads(r.content)
+    _IBOOK_CACHE[key] = (now, data)
+    return data
+
 def fetch_api_packages(model: str, mcu_version: str = "", include_beta: bool = False) -> List[Dict[str, Any]]:
     results: List[Dict[str, Any]] = []
     # iBookType 2 = release firmware; also try 1 (may expose beta / pre-release builds)
     ibook_types = [2, 1] if include_beta else [2]
     for ibt in ibook_types:
-        params = {"skuModel": model, "mcuVersion": mcu_version, "langType": 1, "iBookType": ibt}
         try:
-            r = SESSION.get(API_GET_IBOOK_LIST, params=params, timeout=15)
-            r.raise_for_status()
-            data = r.json()
+            data = _get_ibook_list(model, mcu_version, ibt)
         except Exception:
             continue
         pkgs = _parse_ibook_response(data)
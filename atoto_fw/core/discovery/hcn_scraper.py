@@ -7,8 +7,10 @@ import re
 import urllib.request
 from urllib.parse import urljoin
 from typing import List, Dict, Any
+from ..utils import version_from_name
 
 BASE_URL = "http://www.hcn2000.com/uploadsoft/cheji/"
+_HREF_RX = re.compile(r'href=["\']([^"\']+/?)["\']', re.IGNORECASE)
 
 # Mapping from query substring to folder substrings
 KEYWORD_MAPPING = {
@@ -50,7 +52,7 @@ def fetch_directories(url: str) -> List[str]:
         )
         with urllib.request.urlopen(req, timeout=8) as response:
             html = response.read().decode('utf-8', errors='ignore')
-            links = re.findall(r'href=["\']([^"\']+/?)["\']', html, re.IGNORECASE)
+            links = _HREF_RX.findall(html)
             dirs = []
             for link in links:
                 if link.endswith('/') and not link.startswith('?') and '..' not in link:
@@ -141,8 +143,7 @@ def fetch_hcn_server_packages(model: str) -> List[Dict[str, Any]]:
                     file_lower = name.lower()
                     if file_lower.endswith((".zip", ".rar", ".bin", ".img", ".apk")):
                         # Format version from filename
-                        ver_match = re.findall(r'([rv]?[\d._-]+)', name.replace(" ",""))
-                        version = ver_match[0] if ver_match else "N/A"
+                        version = version_from_name(name)
                         if version.endswith("-") or version.endswith("."):
                             version = version[:-1]
                             
@@ -1,36 +1,37 @@
 from __future__ import annotations
-from typing import Any, Dict, List, Tuple, Optional
-from ..utils import head_ok, fetch_json
-from ..utils import url_leaf_name
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+from ..utils import fetch_json_if_ok
+from ..utils import url_leaf_name, version_from_name
 import re
 
 BASE = "https://resources.myatoto.com/atoto-product-ibook/ibMobile"
+PROBE_WORKERS = 10  # well under the shared SESSION's pool (http.POOL_SIZE)
+_SERIES_RX = re.compile(r'([A-Za-z]+?\d+)')
 
 def series_from_model(q: str) -> List[str]:
-    m = re.match(r'([A-Za-z]+?\d+)', q or "")
+    m = _SERIES_RX.match(q or "")
     if m: s = m.group(1); return [s, s.lower(), s.upper()]
     if q and len(q) >= 2: s = q[:2]; return [s, s.lower(), s.upper()]
     return [q, (q or "").lower(), (q or "").upper()]
 
 def candidate_endpoints_for_model(model: str) -> List[str]:
-    m, ml, mu = model, model.lower(), model.upper()
-    series = series_from_model(model)
-    cand = [
-        f"{BASE}/{m}.json", f"{BASE}/{ml}.json", f"{BASE}/{mu}.json",
-        f"{BASE}/{m}/index.json", f"{BASE}/{ml}/index.json", f"{BASE}/{mu}/index.json",
-        f"{BASE}/{m}/{m}.json", f"{BASE}/{ml}/{ml}.json", f"{BASE}/{mu}/{mu}.json",
-    ]
-    for s in series:
-        cand += [
-            f"{BASE}/{s}/{m}.json", f"{BASE}/{s}/{ml}.json",
-            f"{BASE}/{s}/firmware/{m}.json", f"{BASE}/{s}/firmware/{ml}.json",
-            f"{BASE}/{s}/{m}/index.json",
-        ]
-    seen, out = set(), []
-    for u in cand:
-        if u not in seen:
-            seen.add(u); out.append(u)
-    return out
+    return list(_candidate_endpoints(model))
+
+@lru_cache(maxsize=512)
+def _candidate_endpoints(model: str) -> Tuple[str, ...]:
+    m = model
+    cases = tuple(dict.fromkeys((m, m.lower(), m.upper())))  # collapses when already lower/upper
+    low = tuple(dict.fromkeys((m, m.lower())))
+    cand: Dict[str, None] = {}
+    for tmpl in ("{c}.json", "{c}/index.json", "{c}/{c}.json"):
+        cand.update(dict.fromkeys(f"{BASE}/" + tmpl.format(c=c) for c in cases))
+    for s in dict.fromkeys(series_from_model(model)):
+        cand.update(dict.fromkeys(f"{BASE}/{s}/{c}.json" for c in low))
+        cand.update(dict.fromkeys(f"{BASE}/{s}/firmware/{c}.json" for c in low))
+        cand[f"{BASE}/{s}/{m}/index.json"] = None
+    return tuple(cand)
 
 def _parse_endpoint(data: Any, base_url: str) -> List[Dict[str, Any]]:
     """Extract package dicts from a parsed JSON endpoint response."""
@@ -47,8 +48,7 @@ def _parse_endpoint(data: Any, base_url: str) -> List[Dict[str, Any]]:
         url = e.get("url") or e.get("file") or e.get("download") or e.get("href")
         if not url: continue
         title   = e.get("title") or e.get("name") or url_leaf_name(url)
-        version = e.get("version") or re.findall(r'([rv]?[\d._-]+)', (title or "").replace(" ", ""))[:1]
-        version = version[0] if isinstance(version, list) and version else (version or "N/A")
+        version = e.get("version") or version_from_name(title)
         size    = e.get("size") or None
         date    = e.get("date") or e.get("time") or e.get("released") or ""
         sha     = e.get("sha256") or e.get("sha1") or e.get("md5") or ""
@@ -57,33 +57,46 @@ def _parse_endpoint(data: Any, base_url: str) -> List[Dict[str, Any]]:
                      "size": size, "url": full, "hash": sha, "source": "JSON"})
     return pkgs
 
-def discover_packages_via_json(model: str, progress=None, seen_endpoints: Optional[set] = None) -> Tuple[List[Dict[str, Any]], str]:
+def _probe_endpoint(u: str) -> List[Dict[str, Any]]:
+    """Fetch one endpoint and return its packages ([] on miss or error)."""
+    try:
+        _, data = fetch_json_if_ok(u)
+    except Exception:
+        return []
+    if data is None:
+        return []
+    return _parse_endpoint(data, u)
+
+def _probe_all(eps: List[str], progress=None, label: str = "") -> List[List[Dict[str, Any]]]:
     """
-    Probe all candidate JSON endpoints for model and return every package found
-    across all of them (not just the first hit). seen_endpoints prevents re-probing
-    the same URL across multiple model candidates.
+    Endpoints are independent: probe them concurrently over the shared session
+    and return each one's packages, aligned with eps (priority order).
     """
-    eps = candidate_endpoints_for_model(model)
-    if seen_endpoints is None: seen_endpoints = set()
-    eps = [u for u in eps if u not in seen_endpoints]
-    total = len(eps) or 1
-
-    all_pkgs: List[Dict[str, Any]] = []
-    first_hit = ""
+    total = len(eps)
+    results: List[List[Dict[str, Any]]] = [[] for _ in eps]
+    with ThreadPoolExecutor(max_workers=min(PROBE_WORKERS, total)) as ex:
+        futs = {ex.submit(_probe_endpoint, u): i for i, u in enumerate(eps)}
+        for done, fut in enumerate(as_completed(futs), start=1):
+            if progress: progress(f"JSON probe {done}/{total} @ {label}")
+            results[futs[fut]] = fut.result()
+    return results
 
-    for i, u in enumerate(eps, start=1):
-        seen_endpoints.add(u)
-        if progress: progress(f"JSON probe {i}/{total} @ {model}")
-        if not head_ok(u): continue
-        try:
-            data = fetch_json(u)
-        except Exception:
-            continue
-
-        pkgs = _parse_endpoint(data, u)
-        if pkgs:
-            if not first_hit:
-                first_hit = u
-            all_pkgs.extend(pkgs)
-
-    return all_pkgs, first_hit
+def discover_packages_for_models(models: List[str], progress=None) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Probe the JSON endpoints of several model candidates in one pool and return
+    every package found, not just the first hit. Each endpoint is probed once
+    and attributed to the first model that produces it; returns
+    (model, packages) in model order.
+    """
+    owner: Dict[str, int] = {}
+    for i, m in enumerate(models):
+        for u in candidate_endpoints_for_model(m):
+            owner.setdefault(u, i)
+    if not owner:
+        return [(m, []) for m in models]
+    eps = list(owner)
+    label = models[0] if len(models) == 1 else f"{len(models)} candidates"
+    per_model: List[List[Dict[str, Any]]] = [[] for _ in models]
+    for u, pkgs in zip(eps, _probe_all(eps, progress, label)):
+        per_model[owner[u]].extend(pkgs)
+    return list(zip(models, per_model))
@@ -1,5 +1,7 @@
 import re
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
 from ..utils import head_info, url_leaf_name, human_size, oss_alternates, normalize_oss_url
 
 KNOWN_LINKS: List[Dict[str,str]] = [
@@ -43,6 +45,74 @@ KNOWN_LINKS: List[Dict[str,str]] = [
     },
 ]
 
+def _build_dispatch(entries: List[Dict[str, str]]):
+    """
+    Combine the distinct KNOWN_LINKS patterns into one regex. Each pattern sits
+    in an optional lookahead at position 0 (with a lazy prefix, like re.search),
+    so a single match() reports every pattern that hits via its named group.
+    """
+    patterns: Dict[str, List[int]] = {}
+    for i, e in enumerate(entries):
+        patterns.setdefault(e["match"], []).append(i)
+    groups = {f"k{n}": idxs for n, idxs in enumerate(patterns.values())}
+    mega = re.compile("".join(
+        f"(?:(?=(?s:.*?)(?P<k{n}>{pat})))?" for n, pat in enumerate(patterns)
+    ))
+    return mega, groups
+
+_KNOWN_MEGA, _KNOWN_GROUPS = _build_dispatch(KNOWN_LINKS)
+
+def _matching_links(model: str) -> List[Dict[str, str]]:
+    m = _KNOWN_MEGA.match(model)
+    hits = [i for name, idxs in _KNOWN_GROUPS.items() if m.start(name) != -1 for i in idxs]
+    return [KNOWN_LINKS[i] for i in sorted(hits)]
+
+_DATE8_RX = re.compile(r'(20\d{6})')
+_DATE6_RX = re.compile(r'(?<!\d)([2-9]\d{5})(?!\d)')
+_MONTH_YEAR_RX = re.compile(
+    r'(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|'
+    r'Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)'
+    r'[\s_-]?(\d{4})',
+    re.IGNORECASE,
+)
+_MONTHS = {
+    "jan": "01", "feb": "02", "mar": "03", "apr": "04",
+    "may": "05", "jun": "06", "jul": "07", "aug": "08",
+    "sep": "09", "oct": "10", "nov": "11", "dec": "12",
+}
+_SEMVER_RX = re.compile(r'[Vv](\d+\.\d+(?:\.\d+)?)')
+
+MIRROR_WORKERS = 8
+
+@lru_cache(maxsize=None)
+def _leaf_meta(fname: str) -> Tuple[str, str]:
+    """
+    (date, version) parsed from a mirror file name. KNOWN_LINKS is static and
+    the OSS/CDN aliases share a leaf name, so each is parsed once per process.
+    """
+    dates_8 = _DATE8_RX.findall(fname)
+    dates_6 = _DATE6_RX.findall(fname)
+    best_date = ""
+    if dates_8:
+        raw_d = max(dates_8)
+        best_date = f"{raw_d[:4]}-{raw_d[4:6]}-{raw_d[6:]}"
+    elif dates_6:
+        raw_d = max(dates_6)
+        best_date = f"20{raw_d[:2]}-{raw_d[2:4]}-{raw_d[4:]}"
+
+    # Month-year fallback for filenames like "v1.1.1_April2024"
+    if not best_date:
+        m = _MONTH_YEAR_RX.search(fname)
+        if m:
+            mon = _MONTHS.get(m.group(1)[:3].lower(), "01")
+            best_date = f"{m.group(2)}-{mon}"
+
+    # Semver extraction for version-numbered firmware (e.g. v1.1.1, V1.0.3)
+    semver_m = _SEMVER_RX.search(fname)
+    base_ver = fname[:-4] if fname.lower().endswith(".zip") else fname
+    ver = semver_m.group(0) if semver_m else base_ver
+    return best_date, ver
+
 def _head_with_fallback(url: str, timeout: int = 3) -> Dict[str, Any]:
     """Try the primary URL then its CDN/OSS alias; return first successful HEAD."""
     for candidate in oss_alternates(url):
@@ -54,57 +124,31 @@ def _head_with_fallback(url: str, timeout: int = 3) -> Dict[str, Any]:
 
 def known_links_for_model(model: str) -> List[Dict[str, Any]]:
     out = []
-    for entry in KNOWN_LINKS:
-        if re.search(entry["match"], model):
-            url = normalize_oss_url(entry["url"])
-            info = _head_with_fallback(url, timeout=3)
-            resolved_url = info.pop("_url", url)
-            
-            if info["ok"]:
-                fname = url_leaf_name(resolved_url)
-                title = entry.get("title") or fname
-
-                dates_8 = re.findall(r'(20\d{6})', fname)
-                dates_6 = re.findall(r'(?<!\d)([2-9]\d{5})(?!\d)', fname)
-                best_date = ""
-                if dates_8:
-                    raw_d = max(dates_8)
-                    best_date = f"{raw_d[:4]}-{raw_d[4:6]}-{raw_d[6:]}"
-                elif dates_6:
-                    raw_d = max(dates_6)
-                    best_date = f"20{raw_d[:2]}-{raw_d[2:4]}-{raw_d[4:]}"
-
-                # Month-year fallback for filenames like "v1.1.1_April2024"
-                if not best_date:
-                    m = re.search(
-                        r'(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|'
-                        r'Jul(?:y)?|Aug(?:ust)?|Sep(?:tember)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)'
-                        r'[\s_-]?(\d{4})',
-                        fname, re.IGNORECASE
-                    )
-                    if m:
-                        _months = {
-                            "jan": "01", "feb": "02", "mar": "03", "apr": "04",
-                            "may": "05", "jun": "06", "jul": "07", "aug": "08",
-                            "sep": "09", "oct": "10", "nov": "11", "dec": "12",
-                        }
-                        mon = _months.get(m.group(1)[:3].lower(), "01")
-                        best_date = f"{m.group(2)}-{mon}"
-
-                # Semver extraction for version-numbered firmware (e.g. v1.1.1, V1.0.3)
-                semver_m = re.search(r'[Vv](\d+\.\d+(?:\.\d+)?)', fname)
-                base_ver = fname[:-4] if fname.lower().endswith(".zip") else fname
-                ver = semver_m.group(0) if semver_m else base_ver
-
-                out.append({
-                    "id": "0",
-                    "title": f"[mirror] {title}",
-                    "version": ver,
-                    "date": best_date,
-                    "size": info["size"],
-                    "url": resolved_url,
-                    "hash": "",
-                    "source": "MIRROR",
-                })
+    entries = _matching_links(model)
+    if not entries:
+        return out
+    urls = [normalize_oss_url(e["url"]) for e in entries]
+    # Mirrors are independent: HEAD them concurrently, keep table order
+    with ThreadPoolExecutor(max_workers=min(MIRROR_WORKERS, len(urls))) as pool:
+        infos = list(pool.map(lambda u: _head_with_fallback(u, timeout=3), urls))
+    for entry, url, info in zip(entries, urls, infos):
+        resolved_url = info.pop("_url", url)
+
+        if info["ok"]:
+            fname = url_leaf_name(resolved_url)
+            title = entry.get("title") or fname
+
+            best_date, ver = _leaf_meta(fname)
+
+            out.append({
+                "id": "0",
+                "title": f"[mirror] {title}",
+                "version": ver,
+                "date": best_date,
+                "size": info["size"],
+                "url": resolved_url,
+                "hash": "",
+                "source": "MIRROR",
+            })
     for i,p in enumerate(out,1): p["id"]=str(i)
     return out
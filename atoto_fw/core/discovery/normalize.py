@@ -1,6 +1,7 @@
 from __future__ import annotations
 import re
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, List, Tuple
 
 """
 Model normalization helpers.
@@ -132,13 +133,25 @@ COMMON_VARIANTS = [
     "-DEBUG", "_DEBUG",
 ]
 
+# COMMON_VARIANTS as flat (dashed, undashed) suffix pairs, resolved once at import
+_VARIANT_SUFFIXES = tuple(
+    v for suf in COMMON_VARIANTS
+    for v in ((suf if suf.startswith("-") else "-" + suf),
+              (suf if not suf.startswith("-") else suf[1:]))
+)
+
+_SERIES_RX = re.compile(r'([A-Za-z]+?\d+)')
+_WS_RX = re.compile(r"\s+")
+_TRAIL_ALPHA = re.compile(r"[A-Z]+$")
+_BASE_STRIP = re.compile(r"-S\d{2}[A-Z]?$")
+
 def series_from_model(q: str) -> List[str]:
     """
     Extract a series token (e.g., 'S8G2') from a model-ish string.
     Returns a few casings for convenience.
     """
     q = (q or "").strip()
-    m = re.match(r'([A-Za-z]+?\d+)', q)
+    m = _SERIES_RX.match(q)
     if m:
         s = m.group(1)
         return [s, s.lower(), s.upper()]
@@ -152,82 +165,69 @@ def normalize_candidates(raw: str) -> List[str]:
     Expand one input string into many candidates ATOTO’s API/JSON endpoints
     might accept. Order is "best guess first".
     """
+    # Pure function of raw: memoized for re-queries; fresh list for callers to extend
+    return list(_normalize_candidates(raw))
+
+@lru_cache(maxsize=512)
+def _normalize_candidates(raw: str) -> Tuple[str, ...]:
     r = (raw or "").strip().upper()
-    r = re.sub(r"\s+", "", r)
+    r = _WS_RX.sub("", r)
 
-    mapped = RETAIL_TO_CANONICAL.get(r, [])
-    out: List[str] = list(mapped)
+    # Insertion-ordered set: keys keep "best guess first" order, no dupes
+    out: Dict[str, None] = dict.fromkeys(RETAIL_TO_CANONICAL.get(r, []))
 
     # If user typed the on-device "ATL-S8-HU" name, point to MS family
     if r.startswith("ATL-S8"):
         base_guess = "S8G2A74MS"
         for suf in ("-S01","-S10",""):
-            v = base_guess + suf
-            if v not in out:
-                out.append(v)
+            out.setdefault(base_guess + suf, None)
 
     # Always include exactly what the user typed
-    if r and r not in out:
-        out.append(r)
+    if r:
+        out.setdefault(r, None)
 
     # Base without trailing -Sxx variant / trailing letters
-    base = re.sub(r"([A-Z0-9-]*[A-Z0-9])(?!-S\d{2}[A-Z]?)?[A-Z]*$", r"\1", r)
-    if base and base not in out:
-        out.append(base)
+    base = _BASE_STRIP.sub("", r)
+    if base:
+        out.setdefault(base, None)
 
     # EG2 → G2 (ATOTO uses both across docs/assets)
     eg2_to_g2 = base.replace("EG2", "G2")
-    if eg2_to_g2 and eg2_to_g2 not in out:
-        out.append(eg2_to_g2)
+    if eg2_to_g2:
+        out.setdefault(eg2_to_g2, None)
 
     # Also a version with trailing letters stripped
-    base2 = re.sub(r"[A-Z]+$", "", eg2_to_g2)
-    if base2 and base2 not in out:
-        out.append(base2)
+    base2 = _TRAIL_ALPHA.sub("", eg2_to_g2)
+    if base2:
+        out.setdefault(base2, None)
 
     # Try common variant suffixes with and without a dash
-    for suf in COMMON_VARIANTS:
-        dash   = eg2_to_g2 + (suf if suf.startswith("-") else "-" + suf)
-        nodash = eg2_to_g2 + (suf if not suf.startswith("-") else suf[1:])
-        for v in (dash, nodash):
-            if v not in out:
-                out.append(v)
-
-    # Dedup but keep order
-    seen, ordered = set(), []
-    for x in out:
-        if x and x not in seen:
-            seen.add(x)
-            ordered.append(x)
-    return ordered
+    out.update(dict.fromkeys(eg2_to_g2 + suf for suf in _VARIANT_SUFFIXES))
+
+    return tuple(out)
 
 def build_suggestions(raw: str) -> List[str]:
     """
     Rank normalized candidates to show in a UI list.
     """
     cands = normalize_candidates(raw)
-    ranked: List[str] = []
 
     # 1) If we have direct retail→canonical mapping, show those first
-    mapped = RETAIL_TO_CANONICAL.get(raw.upper(), [])
-    ranked += mapped
+    ranked: Dict[str, None] = dict.fromkeys(RETAIL_TO_CANONICAL.get(raw.upper(), []))
 
     # 2) Prefer explicit S01/S10 endings
     for suf in ("-S01","-S10"):
         for c in cands:
-            if c.endswith(suf) and c not in ranked:
-                ranked.append(c)
+            if c.endswith(suf):
+                ranked.setdefault(c, None)
 
     # 3) Put a clean base form near the top
-    base = re.sub(r"([A-Z0-9-]*[A-Z0-9])(?:-S\d{2}[A-Z]?)?$", r"\1",
-                  (cands[0] if cands else raw).upper())
-    for c in cands:
-        if c == base and c not in ranked:
-            ranked.append(c)
+    base = _BASE_STRIP.sub("", (cands[0] if cands else raw).upper())
+    if base in cands:
+        ranked.setdefault(base, None)
 
     # 4) Append the rest
     for c in cands:
-        if c not in ranked:
-            ranked.append(c)
+        ranked.setdefault(c, None)
 
-    return ranked[:8]
+    return list(ranked)[:8]
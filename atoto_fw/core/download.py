@@ -5,24 +5,26 @@ from typing import Callable, Optional
 import logging
 
 from .http import SESSION
-from .utils import sha256_file
+from .utils import full_size_from_response, hasher_for, hash_file_into
 
 logger = logging.getLogger(__name__)
 
 ProgressCB = Callable[[int, int], None]  # (downloaded_bytes, total_bytes)
+PROGRESS_STEP = 256 * 1024  # min bytes between on_progress calls
 
 def download_with_resume(
     url: str,
     out_path: Path,
     expected_hash: str = "",
     on_progress: Optional[ProgressCB] = None,
-    chunk_size: int = 128 * 1024,
+    chunk_size: int = 1024 * 1024,
 ) -> None:
     """
     Core downloader: resumable, no UI dependencies.
     - Writes to <file>.part and renames atomically at end
     - Calls on_progress(downloaded, total) if provided
-    - Optional checksum verify (sha256/sha1/md5 detected by length)
+    - Optional checksum verify (sha256/sha1/md5 detected by length), hashed
+      while streaming so the file is not read back afterwards
     """
     tmp = out_path.with_suffix(out_path.suffix + ".part")
     resume = tmp.stat().st_size if tmp.exists() else 0
@@ -32,35 +34,35 @@ def download_with_resume(
 
     with SESSION.get(url, stream=True, headers=headers, timeout=30) as r:
         r.raise_for_status()
-        total = int(r.headers.get("Content-Length", "0"))
-        # If partial, try to compute full total
-        if r.status_code == 206 and total:
-            try:
-                head = SESSION.head(url, timeout=10, allow_redirects=True)
-                full_total = int(head.headers.get("Content-Length", total))
-                total = resume + (full_total - resume)
-            except Exception:
-                total = resume + total
+        # Server ignored Range: appending would corrupt the file (and the hash)
+        if resume > 0 and r.status_code == 200:
+            logger.debug("Server does not support resume; restarting")
+            resume = 0
+
+        h = hasher_for(expected_hash) if expected_hash else None
+        if h is not None and resume > 0:
+            hash_file_into(h, tmp)
+        total = full_size_from_response(r, resume)
 
         mode = "ab" if resume > 0 else "wb"
         downloaded = resume
+        next_update = downloaded + PROGRESS_STEP
         with open(tmp, mode) as f:
             for chunk in r.iter_content(chunk_size=chunk_size):
                 if not chunk:
                     continue
                 f.write(chunk)
+                if h is not None:
+                    h.update(chunk)
                 downloaded += len(chunk)
-                if on_progress:
+                if on_progress and downloaded >= next_update:
                     on_progress(downloaded, total)
+                    next_update = downloaded + PROGRESS_STEP
+        if on_progress:
+            on_progress(downloaded, total)
 
-    if expected_hash:
+    if h is not None:
         logger.debug("Verifying checksum before finalizing")
-        import hashlib
-        algo = "sha256" if len(expected_hash) == 64 else ("sha1" if len(expected_hash) == 40 else "md5")
-        h = hashlib.new(algo)
-        with tmp.open("rb") as f:
-            for chunk in iter(lambda: f.read(1024 * 1024), b""):
-                h.update(chunk)
         digest = h.hexdigest()
         if digest.lower() != expected_hash.lower():
             tmp.unlink(missing_ok=True)
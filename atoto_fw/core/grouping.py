@@ -1,14 +1,17 @@
 from __future__ import annotations
 import re
-from typing import Any, Dict, List
-from .variants import infer_resolution_from_name, scope_from_res, detect_variants_from_text
+from typing import Any, Dict, List, Tuple
+from .variants import classify_text
+
+_DATE8 = re.compile(r'^\d{8}$')
+_DATE6 = re.compile(r'^\d{6}$')
 
 def _date_sort_key(r: Dict[str, Any]) -> str:
     """Normalize date strings to YYYY-MM-DD for descending sort. Empty dates sort last."""
     d = (r.get("date") or "").strip()
-    if re.match(r'^\d{8}$', d):          # YYYYMMDD → YYYY-MM-DD
+    if _DATE8.match(d):          # YYYYMMDD → YYYY-MM-DD
         d = f"{d[:4]}-{d[4:6]}-{d[6:]}"
-    elif re.match(r'^\d{6}$', d):        # YYMMDD → 20YY-MM-DD
+    elif _DATE6.match(d):        # YYMMDD → 20YY-MM-DD
         d = f"20{d[:2]}-{d[2:4]}-{d[4:]}"
     return d if d else "0000-00-00"      # empty → sorts last
 
@@ -19,17 +22,16 @@ def sort_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
 def tag_rows(rows: List[Dict[str,Any]], my_res: str) -> None:
     my_res = (my_res or "").lower().replace("×","x")
     for r in rows:
-        title_url = f"{r.get('title','')} {r.get('url','')}"
-        guess = infer_resolution_from_name(title_url)
+        guess, r["scope"], r["variants"] = classify_text(f"{r.get('title','')} {r.get('url','')}")
         r["res"] = guess
-        r["scope"] = scope_from_res(guess, title_url)
-        r["variants"] = ",".join(detect_variants_from_text(title_url)) or "-"
         if guess == "?": r["fit"] = "?"
         elif my_res and guess == my_res: r["fit"] = "✓"
         else: r["fit"] = "⚠"
 
 def group_by_url(rows: List[Dict[str,Any]]) -> List[Dict[str,Any]]:
     grouped: Dict[str, Dict[str, Any]] = {}
+    # variant sets of groups that merged >1 row; joined back to strings once at the end
+    vsets: Dict[str, set] = {}
     for r in rows:
         u = (r.get("url") or "").strip()
         if not u: continue
@@ -38,21 +40,23 @@ def group_by_url(rows: List[Dict[str,Any]]) -> List[Dict[str,Any]]:
             grouped[u] = r.copy()
             continue
         # merge variants
-        v1 = set(filter(None, (g.get("variants","-") or "-").split(",")))
-        v2 = set(filter(None, (r.get("variants","-") or "-").split(",")))
-        v = (v1 | v2) - {"-"}
-        g["variants"] = ",".join(sorted(v)) if v else "-"
+        v = vsets.get(u)
+        if v is None:
+            v = vsets[u] = set((g.get("variants","-") or "-").split(","))
+        v.update((r.get("variants","-") or "-").split(","))
         # prefer concrete res/scope
         if g.get("res","?") == "?" and r.get("res","?") != "?":
             g["res"] = r["res"]; g["fit"] = r.get("fit", g.get("fit","?"))
         if r.get("scope") == "Res-specific":
             g["scope"] = "Res-specific"
+    for u, v in vsets.items():
+        v -= {"", "-"}
+        grouped[u]["variants"] = ",".join(sorted(v)) if v else "-"
     return list(grouped.values())
 
 def dedupe_rows(rows: List[Dict[str,Any]]) -> List[Dict[str,Any]]:
-    seen=set(); out=[]
+    # first row per (url, title) wins; dict keeps insertion order
+    out: Dict[Tuple[str, str], Dict[str,Any]] = {}
     for r in rows:
-        key=((r.get("url") or "").strip(), (r.get("title") or "").strip())
-        if key in seen: continue
-        seen.add(key); out.append(r)
-    return out
+        out.setdefault(((r.get("url") or "").strip(), (r.get("title") or "").strip()), r)
+    return list(out.values())
@@ -5,6 +5,8 @@ import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 UA   = "ATOTO-Firmware-CLI/3.2"
+# Wide enough for the threaded probe fan-outs to reuse connections per host
+POOL_SIZE = 32
 
 def make_session() -> requests.Session:
     retries = Retry(
@@ -13,10 +15,13 @@ def make_session() -> requests.Session:
         allowed_methods=frozenset(["GET","HEAD"]),
         raise_on_status=False,
     )
-    adapter = HTTPAdapter(max_retries=retries, pool_connections=10, pool_maxsize=10)
+    adapter = HTTPAdapter(max_retries=retries, pool_connections=POOL_SIZE,
+                          pool_maxsize=POOL_SIZE, pool_block=False)
     s = requests.Session()
     s.mount("http://", adapter); s.mount("https://", adapter)
-    s.headers.update({"User-Agent": UA})
+    s.headers.update({"User-Agent": UA, "Connection": "keep-alive"})
     return s
 
+# One process-wide session; GET/HEAD through it are safe to share across the
+# ThreadPoolExecutor probes since the adapter pools connections per host.
 SESSION = make_session()
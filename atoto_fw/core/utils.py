@@ -1,9 +1,14 @@
 from __future__ import annotations
-import hashlib, json, math, urllib.parse
+import hashlib, json, re, time, urllib.parse
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 from .http import SESSION
 
+try:
+    import orjson as _orjson  # optional: parses straight from bytes, much faster
+except ImportError:
+    _orjson = None
+
 # Both hostnames resolve to the same Aliyun OSS bucket.
 # file.myatoto.com is a CDN alias ATOTO uses in customer-facing links.
 _ATOTO_OSS = "https://atoto-usa.oss-us-west-1.aliyuncs.com"
@@ -24,68 +29,153 @@ def oss_alternates(url: str) -> List[str]:
         return [url, _ATOTO_OSS + url[len(_MYATOTO_CDN):]]
     return [url]
 
+_SIZE_UNITS = ("B","KB","MB","GB","TB")
+
 def human_size(n: Optional[int]) -> str:
     if not n or n <= 0: return "?"
-    units = ["B","KB","MB","GB","TB"]
-    i = int(math.floor(math.log(n, 1024)))
-    return f"{n/(1024**i):.2f} {units[i]}"
+    # unit index straight from the bit length: exact at powers of 1024, no floats
+    i = min(max(int(n).bit_length() - 1, 0) // 10, len(_SIZE_UNITS) - 1)
+    return f"{n/(1 << (10*i)):.2f} {_SIZE_UNITS[i]}"
+
+# Leading version-ish run of a file name/title, e.g. "v1.2.3" or "230609"
+_VER_RX = re.compile(r'[rv]?[\d._-]+')
+
+def version_from_name(name: str) -> str:
+    """First version-looking run in name (spaces ignored), or "N/A"."""
+    m = _VER_RX.search((name or "").replace(" ", ""))  # stops at the first hit, unlike findall
+    return m.group(0) if m else "N/A"
 
 def url_leaf_name(u: str) -> str:
     return urllib.parse.unquote((u or "").split("/")[-1]) or "download.zip"
 
-def dig(obj: Any, *keys: str) -> Any:
-    cur = obj
-    for k in keys:
-        if not isinstance(cur, dict): return None
-        cur = cur.get(k)
-    return cur
+# HEAD answers per URL for head_info: the same mirrors come up for every
+# candidate and again on re-queries in one session.
+# Entries expire after HEAD_TTL seconds. Only definitive answers are cached:
+# a 403/429/5xx or network error may be transient, so it's retried next time.
+HEAD_TTL = 300.0
+_HEAD_CACHE: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+# Definitive misses, cached like successes (HEAD and JSON alike)
+_GONE = (404, 410)
+# Only these mean "server doesn't do HEAD" and are worth a GET; a 404 is final.
+_HEAD_UNSUPPORTED = (405, 501)
 
-def head_ok(url: str, timeout: int = 10) -> bool:
-    try:
-        r = SESSION.head(url, timeout=timeout, allow_redirects=True)
-        if r.status_code < 400: return True
-        r = SESSION.get(url, timeout=timeout, stream=True)
-        return r.status_code < 400
-    except Exception:
-        return False
+def _cached_head(url: str, timeout: int) -> Dict[str, Any]:
+    now = time.monotonic()
+    hit = _HEAD_CACHE.get(url)
+    if hit is not None and now - hit[0] < HEAD_TTL:
+        return hit[1]
+    r = SESSION.head(url, timeout=timeout, allow_redirects=True)
+    if r.status_code in _HEAD_UNSUPPORTED:
+        # Server blocks HEAD: a streamed GET gives the same headers
+        with SESSION.get(url, timeout=timeout, stream=True) as r:
+            pass
+    if r.status_code < 400:
+        sz = r.headers.get("Content-Length")
+        info = {
+            "ok": True,
+            "size": int(sz) if sz and sz.isdigit() else None,
+            "date": r.headers.get("Last-Modified",""),
+        }
+    else:
+        info = {"ok": False, "size": None, "date": ""}
+        if r.status_code not in _GONE:
+            return info
+    _HEAD_CACHE[url] = (now, info)
+    return info
 
 def head_info(url: str, timeout: int = 10) -> Dict[str, Any]:
     """Returns {ok, size, date} from HEAD request."""
-    default = {"ok": False, "size": None, "date": ""}
     try:
-        r = SESSION.head(url, timeout=timeout, allow_redirects=True)
-        if r.status_code >= 400:
-            # Try GET stream if HEAD fails (sometimes servers block HEAD)
-            r = SESSION.get(url, timeout=timeout, stream=True)
-            r.close() # just reading headers
-        
-        if r.status_code < 400:
-            sz = r.headers.get("Content-Length")
-            return {
-                "ok": True,
-                "size": int(sz) if sz and sz.isdigit() else None,
-                "date": r.headers.get("Last-Modified",""),
-            }
+        return dict(_cached_head(url, timeout))
     except Exception:
-        pass
-    return default
+        return {"ok": False, "size": None, "date": ""}
+
+def json_loads(data: bytes) -> Any:
+    """Parse a JSON response body from bytes, skipping requests' text decode."""
+    if _orjson is not None:
+        try:
+            return _orjson.loads(data)
+        except _orjson.JSONDecodeError:
+            pass  # e.g. BOM / UTF-16 bodies; stdlib sniffs those
+    return json.loads(data)
+
+# JSON endpoint answers per URL, kept like the HEAD cache: a repeat search
+# in the same session probes exactly the same endpoints again.
+# Callers must treat the cached data as read-only.
+JSON_TTL = 300.0
+_JSON_CACHE: Dict[str, Tuple[float, Tuple[int, Any]]] = {}
 
-def fetch_json(url: str, timeout: int = 15) -> Any:
+def fetch_json_if_ok(url: str, timeout: int = 10) -> Tuple[int, Any]:
+    """
+    One GET instead of a HEAD then a GET: (status, parsed JSON) on
+    success, (status, None) for a 4xx miss. 5xx and network errors raise (and so
+    aren't cached); a body that isn't JSON raises too. Only successes and
+    404/410 misses are cached.
+    """
+    now = time.monotonic()
+    hit = _JSON_CACHE.get(url)
+    if hit is not None and now - hit[0] < JSON_TTL:
+        return hit[1]
     r = SESSION.get(url, timeout=timeout)
-    r.raise_for_status()
-    try:
-        return r.json()
-    except Exception:
-        import json as _json
-        return _json.loads(r.text)
+    if r.status_code >= 500:
+        r.raise_for_status()
+    if r.status_code >= 400:
+        res = (r.status_code, None)
+        if r.status_code not in _GONE:
+            return res
+    else:
+        res = (r.status_code, json_loads(r.content))
+    _JSON_CACHE[url] = (now, res)
+    return res
+
+def clear_http_caches() -> None:
+    """Forget cached HEAD/JSON answers so the next lookup hits the network."""
+    _HEAD_CACHE.clear()
+    _JSON_CACHE.clear()
+
+_CONTENT_RANGE_RX = re.compile(r"bytes\s+\d+-\d+/(\d+)")
+
+def full_size_from_response(r, resume: int = 0) -> int:
+    """
+    Full file size for a download GET, 0 if unknown. A 206 carries the total in
+    Content-Range, so no extra HEAD is needed to size a resumed download.
+    """
+    length = int(r.headers.get("Content-Length") or 0)
+    if r.status_code == 206:
+        m = _CONTENT_RANGE_RX.match(r.headers.get("Content-Range", ""))
+        if m:
+            return int(m.group(1))
+        return resume + length if length else 0
+    return length
 
 def sha256_file(path: Path) -> str:
-    h = hashlib.sha256()
     with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024*1024), b""):
-            h.update(chunk)
+        if hasattr(hashlib, "file_digest"):  # 3.11+: read/hash loop runs in C
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        h = hashlib.sha256()
+        _update_from_file(h, f)
     return h.hexdigest()
 
+def _update_from_file(h, f, bufsize: int = 256 * 1024) -> None:
+    """Feed an open binary file into h through one reused buffer."""
+    buf = bytearray(bufsize)
+    view = memoryview(buf)
+    while True:
+        n = f.readinto(buf)
+        if not n:
+            break
+        h.update(view[:n])
+
+def hasher_for(expected_hash: str):
+    """New hashlib object for a hex digest, picked by length (sha256/sha1/md5)."""
+    n = len(expected_hash)
+    return hashlib.new("sha256" if n == 64 else ("sha1" if n == 40 else "md5"))
+
+def hash_file_into(h, path: Path) -> None:
+    """Feed an existing file (e.g. a resumed .part) into hasher h."""
+    with path.open("rb") as f:
+        _update_from_file(h, f)
+
 def _ver_tuple(v: str):
     try:
         return tuple(int(x) for x in v.split("."))
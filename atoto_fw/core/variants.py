@@ -1,22 +1,42 @@
+from __future__ import annotations
 import re
 
-def infer_resolution_from_name(s: str) -> str:
-    s = (s or "").lower().replace("×","x")
-    if re.search(r"1024[^0-9]*600", s): return "1024x600"
-    if re.search(r"(1280[^0-9]*720|720[^0-9]*1280)", s): return "1280x720"
+_RES_1024 = re.compile(r"1024[^0-9]*600")
+_RES_1280 = re.compile(r"(1280[^0-9]*720|720[^0-9]*1280)")
+# Token as a whole word, or wrapped in -/_/. separators (lookarounds keep
+# neighbouring tokens like "MS_PE" matchable).
+_VARIANT_RX = re.compile(r"\b(MS|PE|PM)\b|(?<=[-_.])(MS|PE|PM)(?=[-_.])")
+_SCOPE_RX = re.compile(r"(universal|all[-_]?res|all[-_]?resolution|both[-_]?res|generic)")
+
+# The _*_norm kernels take text already case-normalized by the caller, so a row
+# can be lowered/uppercased once and shared by all three checks.
+def _res_norm(low: str) -> str:
+    if _RES_1024.search(low): return "1024x600"
+    if _RES_1280.search(low): return "1280x720"
     return "?"
 
+def _scope_norm(res: str, low: str) -> str:
+    if res != "?": return "Res-specific"
+    return "Universal" if _SCOPE_RX.search(low) else "⚠ Unknown Res"
+
+def _variants_norm(up: str) -> list[str]:
+    return sorted({a or b for a, b in _VARIANT_RX.findall(up)})
+
+def infer_resolution_from_name(s: str) -> str:
+    return _res_norm((s or "").lower().replace("×","x"))
+
 def detect_variants_from_text(s: str) -> list[str]:
-    s = (s or "").upper()
-    found = set()
-    for token in ("MS","PE","PM"):
-        import re as _re
-        if _re.search(rf"\b{token}\b", s) or _re.search(rf"[-_\.]{token}[-_\.]", s):
-            found.add(token)
-    return sorted(found)
+    return _variants_norm((s or "").upper())
 
 def scope_from_res(res: str, title_url: str) -> str:
-    if res != "?": return "Res-specific"
-    import re as _re
-    hint = _re.search(r"(universal|all[-_]?res|all[-_]?resolution|both[-_]?res|generic)", (title_url or "").lower())
-    return "Universal" if hint else "⚠ Unknown Res"
+    return _scope_norm(res, (title_url or "").lower())
+
+def classify_text(title_url: str) -> tuple[str, str, str]:
+    """
+    (res, scope, variants) for one row: same results as the three helpers
+    above, but the text is case-folded once for all of them.
+    """
+    title_url = title_url or ""
+    low = title_url.lower().replace("×","x")
+    res = _res_norm(low)
+    return res, _scope_norm(res, low), ",".join(_variants_norm(title_url.upper())) or "-"
@@ -5,6 +5,7 @@ Shared TUI components (Menu, helpers) for ATOTO Firmware Downloader.
 """
 from __future__ import annotations
 import re
+from functools import lru_cache
 from typing import Any, List, Tuple, Optional
 from rich.console import Console
 from rich.panel import Panel
@@ -45,8 +46,7 @@ def clear_screen(console: Console) -> None:
     except Exception:
         pass
 
-def header_art() -> str:
-    return r"""
+_HEADER_ART = r"""
    ___   ______ ____  ______ ____ 
   /   | /_  __// __ \_  __// __ \
  / /| |  / /  / / / / / /  / / / /
@@ -54,12 +54,18 @@ def header_art() -> str:
 /_/  |_|/_/   \____/ /_/   \____/  
 """
 
+def header_art() -> str:
+    return _HEADER_ART
+
+_UNSAFE_FN = re.compile(r'[\\/*?:"<>|]+')
+
 def safe_filename(name: str) -> str:
-    return re.sub(r'[\\/*?:"<>|]+', "_", (name or "")).strip() or "file"
+    return _UNSAFE_FN.sub("_", (name or "")).strip() or "file"
 
+@lru_cache(maxsize=None)
 def get_full_header() -> str:
-    """Return art + system info for consistent UI."""
-    h = header_art().rstrip()
+    """Return art + system info for consistent UI (fixed per process, built once)."""
+    h = _HEADER_ART.rstrip()
     s = get_system_label()
     return f"[bold magenta]{h}[/]\n{s}"
 
@@ -18,7 +18,7 @@ from typing import Any, Dict, List, Optional
 
 from rich.console import Console
 from rich.panel import Panel
-from rich.prompt import Prompt, Confirm
+from rich.prompt import Prompt, Confirm, IntPrompt
 from rich.table import Table
 from rich import box
 from rich.status import Status
@@ -40,6 +40,7 @@ from .core import (
     add_history_entry,
 )
 from .core.utils import url_leaf_name  # leaf filename helper
+from .core.discovery import clear_caches
 from .tui import Menu, header_art, clear_screen, safe_filename, msvcrt, section
 
 # Add-ons registry (optional, used by Advanced / Add-ons menu)
@@ -234,6 +235,7 @@ def profile_menu(cfg: Dict[str, Any]) -> Optional[Dict[str, Any]]:
                     del cfg["profiles"][to_edit]
                 cfg["profiles"][p["name"]] = p
                 save_cfg(cfg)
+                clear_caches()
         else:
              # It's a profile name
             key = choice
@@ -432,15 +434,21 @@ _RETRY_ON = (
     "requests.exceptions.Timeout",
 )
 _MAX_DL_RETRIES = 3
+_DL_CHUNK = 1024 * 1024          # fewer Python-level iterations on fast links
+_DL_PROGRESS_STEP = 256 * 1024   # redraw the bar at most every this many bytes
 
 def download_with_progress(url: str, out_path: Path, expected_hash: str = "", session=None) -> None:
-    import time, hashlib
+    import time
     import requests as _req
 
     from .core import SESSION
+    from .core.utils import full_size_from_response, hasher_for, hash_file_into
     sess = session if session else SESSION
 
     tmp = out_path.with_suffix(out_path.suffix + ".part")
+    # Hashed while streaming; `hashed` tracks how many bytes of tmp h has seen
+    h = None
+    hashed = 0
 
     for attempt in range(_MAX_DL_RETRIES + 1):
         # Re-read resume point each attempt so partial progress is kept
@@ -457,15 +465,14 @@ def download_with_progress(url: str, out_path: Path, expected_hash: str = "", se
                     tmp.unlink(missing_ok=True)
                     resume = 0
 
-                total = int(r.headers.get("Content-Length", "0"))
-                if r.status_code == 206 and total:
-                    try:
-                        full = SESSION.head(url, timeout=8, allow_redirects=True)
-                        total = int(full.headers.get("Content-Length", 0))
-                    except Exception:
-                        total = resume + total
+                if expected_hash and (h is None or hashed != resume):
+                    h = hasher_for(expected_hash)
+                    if resume > 0:
+                        hash_file_into(h, tmp)
+                    hashed = resume
 
-                p_total = (resume + total) if total > 0 else None
+                total = full_size_from_response(r, resume)
+                p_total = total if total > 0 else None
                 mode = "ab" if resume > 0 else "wb"
                 downloaded = resume
 
@@ -481,13 +488,20 @@ def download_with_progress(url: str, out_path: Path, expected_hash: str = "", se
                         transient=False,
                     ) as progress:
                         task_id = progress.add_task("dl", total=p_total, completed=downloaded)
+                        next_update = downloaded + _DL_PROGRESS_STEP
                         with open(tmp, mode) as f:
-                            for chunk in r.iter_content(chunk_size=128 * 1024):
+                            for chunk in r.iter_content(chunk_size=_DL_CHUNK):
                                 if not chunk:
                                     continue
                                 f.write(chunk)
+                                if h is not None:
+                                    h.update(chunk)
+                                    hashed += len(chunk)
                                 downloaded += len(chunk)
-                                progress.update(task_id, completed=downloaded)
+                                if downloaded >= next_update:
+                                    progress.update(task_id, completed=downloaded)
+                                    next_update = downloaded + _DL_PROGRESS_STEP
+                        progress.update(task_id, completed=downloaded)
                 except KeyboardInterrupt:
                     console.print(
                         f"\n[yellow]Download paused.[/] Partial file kept — next run will resume.\n"
@@ -512,18 +526,13 @@ def download_with_progress(url: str, out_path: Path, expected_hash: str = "", se
 
     tmp.rename(out_path)
 
-    if expected_hash:
+    if h is not None:
         console.print("Verifying checksum…")
-        algo = "sha256" if len(expected_hash) == 64 else ("sha1" if len(expected_hash) == 40 else "md5")
-        h = hashlib.new(algo)
-        with out_path.open("rb") as f:
-            for chunk in iter(lambda: f.read(1024 * 1024), b""):
-                h.update(chunk)
         digest = h.hexdigest()
         if digest.lower() != expected_hash.lower():
             console.print(f"[red]Checksum mismatch![/] expected {expected_hash}, got {digest}")
         else:
-            console.print(f"[green]Checksum OK[/] ({algo})")
+            console.print(f"[green]Checksum OK[/] ({h.name})")
 
     console.print(f"\n[bold green]Download Complete![/] Saved to: {out_path.name}")
     console.input("[dim]Press Enter to continue...[/]")
@@ -800,6 +809,7 @@ def _settings_menu(cfg: Dict[str, Any], out_dir: Path) -> None:
         verbose_lbl    = "[green]ON[/]"  if cfg.get("verbose")          else "[dim]off[/]"
         auto_open_lbl  = "[green]ON[/]"  if cfg.get("auto_open_folder") else "[dim]off[/]"
         beta_lbl       = "[yellow]ON[/]" if cfg.get("include_beta")     else "[dim]off[/]"
+        crc_lbl        = "[green]ON[/]"  if cfg.get("verify_zip_crc", True) else "[dim]off[/]"
         hist_count     = len(cfg.get("history", []))
         upd = _poll_update()
         ver_line = (
@@ -811,6 +821,8 @@ def _settings_menu(cfg: Dict[str, Any], out_dir: Path) -> None:
             (f"Verbose logging          {verbose_lbl}",         "VERBOSE"),
             (f"Auto-open folder         {auto_open_lbl}",       "AUTO_OPEN"),
             (f"Include beta firmware    {beta_lbl}",            "BETA"),
+            (f"Verify zip CRCs          {crc_lbl}",             "ZIP_CRC"),
+            (f"Repack Brotli quality    {cfg.get('brotli_quality', 4)}", "BROTLI_Q"),
             (f"Download history         {hist_count} entries",  "HISTORY"),
             ("Open output folder",                               "OPEN_OUT"),
             ("Open config folder",                               "OPEN_CFG"),
@@ -841,6 +853,16 @@ def _settings_menu(cfg: Dict[str, Any], out_dir: Path) -> None:
                 f"[dim]Beta firmware search {state}. "
                 "Beta builds may be unstable — use at your own risk.[/]"
             )
+        elif choice == "ZIP_CRC":
+            cfg["verify_zip_crc"] = not cfg.get("verify_zip_crc", True)
+            save_cfg(cfg)
+            state = "enabled" if cfg["verify_zip_crc"] else "disabled"
+            console.print(f"[dim]Zip CRC verification {state}.[/]")
+        elif choice == "BROTLI_Q":
+            q = IntPrompt.ask("Brotli quality for repacking (0 = fastest, 11 = smallest)",
+                              default=cfg.get("brotli_quality", 4))
+            cfg["brotli_quality"] = min(max(q, 0), 11)
+            save_cfg(cfg)
         elif choice == "HISTORY":
             if hist_count == 0:
                 console.print("[dim]No downloads recorded yet.[/]")
@@ -944,40 +966,3 @@ def main_menu(out_dir: Path) -> None:
             
         elif ans == "ADDONS":
             addons_menu()
-
-# ────────────────────────── CLI entry (optional direct run) ──────────────────────────
-def parse_args():
-    import argparse
-    ap = argparse.ArgumentParser(description="ATOTO firmware downloader (menu + profiles)")
-    ap.add_argument("--out", default="ATOTO_Firmware", help="Output directory")
-    ap.add_argument("--model", help="Search for specific model (bypass menu)")
-    ap.add_argument("--res", default="1280x720", help="Resolution for search (default 1280x720)")
-    ap.add_argument("--deep", action="store_true", help="Enable Deep Search")
-    ap.add_argument("--manual", help="Direct URL download")
-    ap.add_argument("--verbose", action="store_true", help="Verbose logging")
-    return ap.parse_args()
-
-def main():
-    args = parse_args()
-    out_dir = Path(args.out)
-    out_dir.mkdir(parents=True, exist_ok=True)
-    
-    # CLI mode
-    if args.manual:
-        manual_url_flow(out_dir / "manual")
-        return
-        
-    if args.model:
-        # Create ad-hoc profile from args
-        p = {
-            "name": "CLI",
-            "model": args.model,
-            "res": args.res,
-            "mcu": "",
-            "variants": "ANY",
-            "prefer_universal": True
-        }
-        run_search_download_flow(p, out_dir, args.verbose, deep_scan=args.deep)
-        return
-
-    main_menu(out_dir)